@@ -1,25 +1,85 @@
 import streamlit as st
 import openai
 import json
+from concurrent.futures import ThreadPoolExecutor
 
-# Load OpenAI API key from Streamlit secrets
-openai.api_key = st.secrets["OPENAI_API_KEY"]
+# Load OpenAI API key from Streamlit secrets (optional when only a local backend is used)
+try:
+    openai.api_key = st.secrets["OPENAI_API_KEY"]
+except Exception:
+    openai.api_key = None
 
-# Agent: Summarization
+# Model backends
 
-def summarize_agent(title: str, full_text: str) -> str:
+class OpenAIBackend:
     """
-    Summarizes the full article and returns a JSON string with keys:
-      - title: article title
-      - summary: list of bullet points
-      - impact: describe impact on Indian stock markets
-      - affected: list of sectors/stocks
-      - tone: Bullish | Bearish | Neutral
+    Chat completions over the OpenAI API (0.28 SDK).
+    """
+
+    def __init__(self, model="gpt-4.1-nano", api_base=None, api_key=None, max_workers=4):
+        self.model = model
+        self.api_base = api_base
+        self.api_key = api_key
+        self.max_workers = max_workers
+
+    def complete(self, prompt: str, temperature: float = 0.4) -> str:
+        kwargs = {}
+        if self.api_base:
+            kwargs["api_base"] = self.api_base
+        if self.api_key:
+            kwargs["api_key"] = self.api_key
+        response = openai.ChatCompletion.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            **kwargs
+        )
+        return response.choices[0].message.content.strip()
+
+    def complete_batch(self, prompts, temperature: float = 0.4):
+        """
+        Complete several prompts concurrently, returning results in order.
+        Failed prompts come back as exceptions rather than aborting the batch.
+        """
+        def run(prompt):
+            try:
+                return self.complete(prompt, temperature)
+            except Exception as e:
+                return e
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            return list(pool.map(run, prompts))
+
+
+class LocalBackend(OpenAIBackend):
     """
+    A local OpenAI-compatible server (llama.cpp `llama-server`, Ollama, vLLM, ...)
+    running on CPU. Such servers batch concurrent requests across their slots, so
+    complete_batch sends one request per slot in parallel.
+    """
+
+    def __init__(self, model="local", api_base="http://localhost:8080/v1", api_key="sk-no-key", max_workers=4):
+        super().__init__(model, api_base, api_key, max_workers)
+
+
+HOSTED = OpenAIBackend()
+
+# Default backend per agent role. These are shared by every session, so pick a
+# different backend per call with the agents' `backend=` argument rather than
+# changing this dict.
+BACKENDS = {
+    "summarize": HOSTED,
+    "aggregate": HOSTED,
+    "executive": HOSTED,
+}
+
+# Agent: Summarization
+
+def _summarize_prompt(title: str, full_text: str, hints: str = "") -> str:
+    hint_line = f"Pre-tagged (keep unless wrong, add only clear omissions): {hints}\n" if hints else ""
     prompt = f"""
 You are a financial journalist.
 Article Title: {title}
-
+{hint_line}
 Article Text:
 """ + full_text + """
 
@@ -33,53 +93,96 @@ Provide the following in JSON format exactly:
   "tone": "Bullish|Bearish|Neutral"
 }}
 """
-    response = openai.ChatCompletion.create(
-        model="gpt-4.1-nano",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4
-    )
-    return response.choices[0].message.content.strip()
+    return prompt
+
+
+def summarize_agent(title: str, full_text: str, hints: str = "", backend=None) -> str:
+    """
+    Summarizes the full article and returns a JSON string with keys:
+      - title: article title
+      - summary: list of bullet points
+      - impact: describe impact on Indian stock markets
+      - affected: list of sectors/stocks
+      - tone: Bullish | Bearish | Neutral
+
+    `hints` is an optional compact tag line from Classifier.format_hints
+    that seeds `affected` instead of having the model derive it from scratch.
+    """
+    return (backend or BACKENDS["summarize"]).complete(_summarize_prompt(title, full_text, hints))
+
+
+def summarize_batch(items, backend=None) -> list:
+    """
+    Summarize several articles in one batched backend call.
+
+    Args:
+        items (list): (title, full_text, hints) tuples.
+
+    Returns:
+        list: JSON strings (or exceptions for failed items), in input order.
+    """
+    prompts = [_summarize_prompt(title, text, hints) for title, text, hints in items]
+    return (backend or BACKENDS["summarize"]).complete_batch(prompts)
 
 # Agent: Aggregation
 
-def aggregate_agent(summaries_json: str) -> str:
+def aggregate_agent(summaries_json: str, backend=None) -> str:
     """
-    Takes a JSON array of article summary objects and returns a markdown string with:
+    Takes a JSON array of article summary objects (or the compact table from
+    Encoding.encode_summaries) and returns a markdown string with:
     - Combined summaries under each article title
     - Outlook line per article indicating impact, affected sectors, and tone
     """
     prompt = f"""
 You are a macro-economic and financial news synthesizer.
-The following is a JSON array of article summaries:
+The following are article summaries, as a JSON array or a compact table described by its '#' header lines:
 {summaries_json}
 
 Please produce a markdown report with each article grouped under its title as a header, followed by its summary bullet points and an "Outlook:" line stating impact, affected sectors (if no clear-cut industries then display N/A), affected stocks (if none then display N/A) and tone.
 
 Return only the markdown content.
 """
-    response = openai.ChatCompletion.create(
-        model="gpt-4.1-nano",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4
-    )
-    return response.choices[0].message.content.strip()
+    return (backend or BACKENDS["aggregate"]).complete(prompt)
 
 
 # Executive summary agent (new)
-def executive_summary_agent(summaries_json: str) -> str:
+def executive_summary_agent(summaries_json: str, backend=None) -> str:
     prompt = f"""
 You are a senior financial analyst tasked with writing a one-page executive summary.
-Given the following JSON array of article summaries:
+Given the following article summaries (a JSON array, a JSON object mapping each sector to its pre-classified summaries, or a compact table described by its '#' header lines with '## Sector' group headings):
 {summaries_json}
+Items with related articles stand for several articles covering the same story; weight them accordingly.
 
 Craft a concise, structured, 1-page overview organized by exactly the following key sectors - Macroeconomic Updates, Banking & Financial Services, Infrastructure, Power & Energy, IT & Telecom, Metals and Chemicals, Industrial Goods, Consumer Goods, Real Estate, Services, Pharma, Auto.
 Each section should highlight top bullet points and sector-specific insights.
+When summaries are already grouped by sector, use that grouping as-is rather than re-assigning articles.
 This should be followed by an Sector-Specific Analysis sub-section which has Tailwinds, Headwinds and Neutral sections with the appropriate corresponding sectors for each based on your overall analysis of each sector based on its respective article summaries.
+Start each sector with a "## <Sector>" heading and the analysis with a "## Sector-Specific Analysis" heading.
 Return only the markdown content for the executive summary.
 """
-    response = openai.ChatCompletion.create(
-        model="gpt-4.1-nano",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4
-    )
-    return response.choices[0].message.content.strip()
+    return (backend or BACKENDS["executive"]).complete(prompt)
+
+
+# Incremental executive summary agents: regenerate one sector section, or only the analysis
+def sector_section_agent(sector: str, summaries_json: str, backend=None) -> str:
+    prompt = f"""
+You are a senior financial analyst updating one section of a one-page executive summary.
+Sector: {sector}
+Article summaries for this sector (JSON, or a compact table described by its '#' header lines):
+{summaries_json}
+
+Write the section for this sector only: start with a "## {sector}" heading, then the top bullet points and sector-specific insights.
+Return only the markdown content for the section.
+"""
+    return (backend or BACKENDS["executive"]).complete(prompt)
+
+
+def sector_analysis_agent(sections_md: str, backend=None) -> str:
+    prompt = f"""
+You are a senior financial analyst. The following are the per-sector sections of today's executive summary:
+{sections_md}
+
+Write the Sector-Specific Analysis sub-section: start with a "## Sector-Specific Analysis" heading, then Tailwinds, Headwinds and Neutral sections listing the appropriate sectors for each based on your overall analysis of each sector's section.
+Return only the markdown content for the analysis.
+"""
+    return (backend or BACKENDS["executive"]).complete(prompt)
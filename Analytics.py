@@ -0,0 +1,284 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Sections used by executive_summary_agent, in display order
+SECTORS = [
+    "Macroeconomic Updates", "Banking & Financial Services", "Infrastructure", "Power & Energy",
+    "IT & Telecom", "Metals and Chemicals", "Industrial Goods", "Consumer Goods", "Real Estate",
+    "Services", "Pharma", "Auto",
+]
+
+# Keyword -> sector. Matched case-insensitively as whole words, allowing only a plural
+# "s"/"es" (see Classifier.classify). A trailing "*" marks a stem that takes any ending
+# ("financ*" -> finance, financial); acronyms written in capitals ("IT", "EV") must
+# appear capitalised.
+SECTOR_KEYWORDS = {
+    "Macroeconomic Updates": ["macro", "macroeconomic", "economy", "economic", "inflation", "gdp", "rbi", "monetary",
+                              "fiscal", "trade", "rupee", "forex"],
+    "Banking & Financial Services": ["bank", "banking", "banker", "financ*", "nbfc", "insur*", "lending", "fintech",
+                                     "mutual fund", "broking"],
+    "Infrastructure": ["infra", "infrastructure", "construction", "road", "railway", "port", "airport", "logistics"],
+    "Power & Energy": ["power", "energy", "oil", "gas", "solar", "renewable", "coal", "petroleum", "utilit*"],
+    "IT & Telecom": ["IT", "IT services", "information technology", "software", "tech", "technology", "telecom",
+                     "digital", "semiconductor"],
+    "Metals and Chemicals": ["metal", "steel", "mining", "alumin*", "copper", "chemical", "fertili*"],
+    "Industrial Goods": ["industrial", "engineering", "capital goods", "defence", "manufactur*", "cement"],
+    "Consumer Goods": ["fmcg", "consumer", "retail", "retailer", "durable", "electronics", "textile", "apparel",
+                       "jewel*", "cosmetic"],
+    "Real Estate": ["real estate", "realty", "property", "properties", "housing"],
+    "Services": ["services", "consult*", "audit", "hospitality", "aviation", "travel", "media"],
+    "Pharma": ["pharma*", "health", "healthcare", "biotech", "hospital", "drug"],
+    "Auto": ["auto", "automobile", "automotive", "vehicle", "EV", "two-wheeler", "tractor", "tyre"],
+}
+
+# Yahoo Finance proxies for each sector's returns
+SECTOR_TICKERS = {
+    "Macroeconomic Updates": "^NSEI",
+    "Banking & Financial Services": "^NSEBANK",
+    "Infrastructure": "^CNXINFRA",
+    "Power & Energy": "^CNXENERGY",
+    "IT & Telecom": "^CNXIT",
+    "Metals and Chemicals": "^CNXMETAL",
+    "Industrial Goods": "^NSEI",
+    "Consumer Goods": "^CNXFMCG",
+    "Real Estate": "^CNXREALTY",
+    "Services": "^CNXSERVICE",
+    "Pharma": "^CNXPHARMA",
+    "Auto": "^CNXAUTO",
+}
+
+TONE_SCORE = {"bullish": 1.0, "bearish": -1.0, "neutral": 0.0}
+
+# Default location of cached daily closes
+MARKET_CACHE_DIR = os.path.join("data", "market_cache")
+
+
+def canonical_sectors(labels):
+    """
+    Map free-text `affected` labels to canonical sectors.
+
+    Keywords and company names are matched on word boundaries by the
+    Classifier automaton, once per distinct label.
+
+    Args:
+        labels (pd.Series): One label per row.
+
+    Returns:
+        pd.DataFrame: (row, sector) pairs for every match; labels may map to several sectors.
+    """
+    # Classifier imports this module's keyword tables, so import it lazily
+    from Classifier import label_sectors
+
+    sectors = labels.dropna().astype(str).map(label_sectors).explode().dropna()
+    return pd.DataFrame({
+        "row": sectors.index.to_numpy(),
+        "sector": sectors.to_numpy(dtype=object),
+    }).drop_duplicates()
+
+
+def sentiment_matrix(summaries_df, min_count=1):
+    """
+    Build a day x sector sentiment matrix from archived summaries.
+
+    Args:
+        summaries_df (pd.DataFrame): Rows with `date`, `affected` (list) and `tone`,
+            e.g. Archive.query_summaries(columns=['affected', 'tone']).
+        min_count (int): Cells backed by fewer articles are set to NaN.
+
+    Returns:
+        tuple: (score, count) DataFrames indexed by date with one column per sector.
+            score is the mean tone (+1 Bullish, -1 Bearish, 0 Neutral).
+    """
+    if summaries_df.empty:
+        empty = pd.DataFrame(columns=SECTORS, dtype=float)
+        return empty, empty.copy()
+
+    df = summaries_df[["date", "affected", "tone"]].copy()
+    df["score"] = df["tone"].astype(str).str.strip().str.lower().map(TONE_SCORE)
+    df = df.dropna(subset=["score"]).reset_index(drop=True)
+    exploded = df.explode("affected")
+    exploded = exploded.reset_index().rename(columns={"index": "article"})
+    hits = canonical_sectors(exploded["affected"].astype("string"))
+
+    tagged = exploded.loc[hits["row"], ["article", "date", "score"]].assign(sector=hits["sector"].to_numpy())
+    # Count each article once per sector, however many labels matched
+    tagged = tagged.drop_duplicates(["article", "sector"])
+
+    dates = pd.to_datetime(tagged["date"])
+    grouped = tagged.assign(date=dates).groupby(["date", "sector"])["score"]
+    score = grouped.mean().unstack().reindex(columns=SECTORS)
+    count = grouped.size().unstack().reindex(columns=SECTORS).fillna(0).astype(int)
+    score = score.where(count >= min_count)
+    return score.sort_index(), count.sort_index()
+
+
+def _last_final_close(now=None):
+    """
+    Latest date whose NSE close is final: today after 16:00 IST, otherwise yesterday.
+    """
+    now = pd.Timestamp.now(tz="Asia/Kolkata") if now is None else pd.Timestamp(now).tz_convert("Asia/Kolkata")
+    today = now.tz_localize(None).normalize()
+    return today if now.hour >= 16 else today - pd.Timedelta(days=1)
+
+
+def _load_coverage(cache_dir):
+    path = os.path.join(cache_dir, "coverage.json")
+    try:
+        with open(path) as f:
+            return {sym: tuple(pd.Timestamp(d) for d in span) for sym, span in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_coverage(cache_dir, coverage):
+    with open(os.path.join(cache_dir, "coverage.json"), "w") as f:
+        json.dump({sym: [d.date().isoformat() for d in span] for sym, span in coverage.items()}, f, indent=1)
+
+
+def cached_closes(symbols, start, end, cache_dir=MARKET_CACHE_DIR, fetch=None, now=None):
+    """
+    Daily closes for several symbols, cached per symbol as Parquet so
+    repeated dashboard renders do not hit Yahoo Finance.
+
+    The date span already requested from the source is recorded per symbol, so
+    weekends, holidays and days whose close is not final yet are not re-fetched
+    on every render; only the missing head or tail of the range is downloaded.
+
+    Args:
+        symbols (list): Yahoo Finance tickers.
+        start, end (date|str): Inclusive date range.
+        cache_dir (str): Cache directory.
+        fetch (callable): fetch(symbol, start, end) -> DataFrame with a Close column,
+            covering only [start, end]. Defaults to yfinance.download.
+        now (datetime): Current time, for tests.
+
+    Returns:
+        pd.DataFrame: Closes indexed by date, one column per symbol.
+    """
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    # Closes after the last final one cannot be cached yet
+    fetch_end = min(end, _last_final_close(now))
+    os.makedirs(cache_dir, exist_ok=True)
+    if fetch is None:
+        def fetch(symbol, lo, hi):
+            import yfinance as yf
+            return yf.download(symbol, start=lo, end=hi + pd.Timedelta(days=1),
+                               progress=False, threads=False, auto_adjust=False)
+
+    coverage = _load_coverage(cache_dir)
+    columns, updated = {}, False
+    for sym in dict.fromkeys(symbols):
+        path = os.path.join(cache_dir, sym.replace("^", "_").replace("=", "_") + ".parquet")
+        closes = pd.read_parquet(path)["Close"] if os.path.exists(path) else pd.Series(dtype=float)
+        covered = coverage.get(sym)
+        if covered is None:
+            gaps = [(start, fetch_end)]
+        else:
+            gaps = [(start, min(covered[0] - pd.Timedelta(days=1), fetch_end)),
+                    (covered[1] + pd.Timedelta(days=1), fetch_end)]
+        # Only gaps containing a weekday can hold a close
+        gaps = [(lo, hi) for lo, hi in gaps if lo <= hi and len(pd.bdate_range(lo, hi))]
+        fetched = False
+        for lo, hi in gaps:
+            try:
+                hist = fetch(sym, lo, hi)
+            except Exception as e:
+                print(f"⚠️ Failed to fetch {sym}: {e}")
+                continue
+            if hist is None or hist.empty or "Close" not in hist:
+                # A short empty gap is a market holiday; a long one is more likely a failed download
+                if len(pd.bdate_range(lo, hi)) > 3:
+                    continue
+            else:
+                new = hist["Close"]
+                if isinstance(new, pd.DataFrame):
+                    new = new.iloc[:, 0]
+                new.index = pd.to_datetime(new.index).tz_localize(None).normalize()
+                closes = pd.concat([closes, new.loc[lo:hi].astype(float)])
+                fetched = True
+            lo_cov, hi_cov = covered or (lo, hi)
+            coverage[sym] = covered = (min(lo_cov, lo), max(hi_cov, hi))
+            updated = True
+        if fetched:
+            closes = closes[~closes.index.duplicated(keep="last")].sort_index()
+            closes.rename("Close").to_frame().to_parquet(path)
+        columns[sym] = closes.loc[start:end]
+    if updated:
+        _save_coverage(cache_dir, coverage)
+    return pd.DataFrame(columns).sort_index()
+
+
+def forward_returns(closes, horizon=1):
+    """
+    Percent return from each close to the close `horizon` trading days later.
+    """
+    return closes.shift(-horizon) / closes - 1.0
+
+
+def align_to_trading_days(score, trading_days):
+    """
+    Roll news days onto the next trading day (weekend news counts for Monday)
+    and average sentiment landing on the same session.
+    """
+    trading_days = pd.DatetimeIndex(trading_days).sort_values()
+    if score.empty or trading_days.empty:
+        return score.iloc[0:0]
+    pos = trading_days.searchsorted(pd.DatetimeIndex(score.index))
+    keep = pos < len(trading_days)
+    rolled = score[keep].set_axis(trading_days[pos[keep]], axis=0)
+    return rolled.groupby(level=0).mean()
+
+
+def sector_returns(closes, horizon=1, sector_tickers=SECTOR_TICKERS):
+    """
+    Forward returns per sector from the sector's proxy ticker closes.
+    """
+    fwd = forward_returns(closes, horizon)
+    return pd.DataFrame({sector: fwd[sym] for sector, sym in sector_tickers.items() if sym in fwd})
+
+
+def rolling_correlation(score, returns, window=20, min_periods=5):
+    """
+    Rolling per-sector correlation between sentiment and forward returns.
+    """
+    score, returns = score.align(returns, join="inner")
+    return score.rolling(window, min_periods=min_periods).corr(returns)
+
+
+def hit_rate(score, returns, window=None):
+    """
+    Share of days where the sign of sentiment matched the sign of the forward return.
+    Neutral sentiment and missing returns are ignored.
+
+    Args:
+        window (int): If given, return a rolling hit rate; otherwise one value per sector.
+    """
+    score, returns = score.align(returns, join="inner")
+    s, r = np.sign(score.to_numpy()), np.sign(returns.to_numpy())
+    valid = (s != 0) & ~np.isnan(s) & ~np.isnan(r)
+    hits = pd.DataFrame(np.where(valid, s == r, 0.0), index=score.index, columns=score.columns)
+    calls = pd.DataFrame(valid.astype(float), index=score.index, columns=score.columns)
+    if window:
+        return hits.rolling(window, min_periods=1).sum() / calls.rolling(window, min_periods=1).sum().replace(0, np.nan)
+    return hits.sum() / calls.sum().replace(0, np.nan)
+
+
+def sentiment_report(summaries_df, closes, horizon=1, window=20, sector_tickers=SECTOR_TICKERS):
+    """
+    One-shot analytics for the dashboard.
+
+    Returns:
+        dict with `score`, `count`, `returns`, `correlation` (rolling) and `hit_rate` (per sector).
+    """
+    score, count = sentiment_matrix(summaries_df)
+    returns = sector_returns(closes, horizon, sector_tickers)
+    aligned = align_to_trading_days(score, returns.index)
+    return {
+        "score": score,
+        "count": count,
+        "returns": returns,
+        "correlation": rolling_correlation(aligned, returns, window),
+        "hit_rate": hit_rate(aligned, returns),
+    }
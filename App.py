@@ -1,21 +1,34 @@
 ### app.py ###
 import streamlit as st
 import json
+import os
 import time
 import yfinance as yf
 import pandas as pd
-from Fetchers import fetch_et_articles, fetch_snippet, fetch_full_text
-from Agents import summarize_agent, aggregate_agent, executive_summary_agent
+from datetime import timedelta
+from Fetchers import iter_et_articles, fetch_et_backfill, group_by_day, resolve_window, IST, HEALTH, ARTICLE_SOURCE
+from Agents import summarize_agent, summarize_batch, aggregate_agent, executive_summary_agent, HOSTED, LocalBackend
+from Embeddings import SummaryIndex, cluster_representatives, load_embedder
+from Archive import archive_run, archived_days, query_summaries
+from Analytics import SECTOR_TICKERS, cached_closes, sentiment_report
+from Classifier import route_by_sector
+from Encoding import encode_summaries, estimate_tokens
+from Executive import refresh_executive
+from Pipeline import stream_pipeline
+from ParsePool import ParsePool
+from Budget import BudgetTracker, RunBudget, plan_run
 
-def safe_fetch_yfinance(ticker, period="100d", interval="1d", retries=5, base_delay=2):
+def safe_fetch_yfinance(ticker, period="100d", interval="1d", retries=5, base_delay=2, start=None, end=None):
     """
     Tries to fetch Yahoo Finance data with retry + exponential backoff.
     Falls back to .history() if download() fails repeatedly.
+    If start/end are given they replace period (end is exclusive, as in yfinance).
     """
+    span = {"start": start, "end": end} if start is not None else {"period": period}
     for attempt in range(1, retries + 1):
         try:
             print(f"🔁 Attempt {attempt} for {ticker} using download()")
-            df = yf.download(ticker, period=period, interval=interval, progress=False, threads=False)
+            df = yf.download(ticker, interval=interval, progress=False, threads=False, **span)
             if df is not None and not df.empty:
                 print("✅ Success via download()")
                 return df
@@ -33,7 +46,7 @@ def safe_fetch_yfinance(ticker, period="100d", interval="1d", retries=5, base_de
     try:
         print(f"⛑ Fallback to .history() for {ticker}")
         ticker_obj = yf.Ticker(ticker)
-        df = ticker_obj.history(period=period, interval=interval)
+        df = ticker_obj.history(interval=interval, **span)
         if df is not None and not df.empty:
             print("✅ Success via .history() fallback")
             return df
@@ -46,6 +59,45 @@ def safe_fetch_yfinance(ticker, period="100d", interval="1d", retries=5, base_de
     return pd.DataFrame()
     
 
+def _fetch_closes(symbol, start, end):
+    return safe_fetch_yfinance(symbol, interval="1d", retries=2, start=start, end=end + timedelta(days=1))
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_sentiment_report(first_day, last_day, horizon, window):
+    """
+    Sector sentiment from the archive joined with cached sector index returns,
+    for archived days first_day through last_day inclusive.
+    """
+    # query_summaries takes a half-open [since, until) range
+    until = (pd.Timestamp(last_day) + pd.Timedelta(days=1)).date()
+    summaries_df = query_summaries(since=first_day, until=until, columns=['affected', 'tone'])
+    closes = cached_closes(SECTOR_TICKERS.values(), first_day, last_day, fetch=_fetch_closes)
+    return sentiment_report(summaries_df, closes, horizon=horizon, window=window)
+
+
+@st.cache_resource(show_spinner="Loading embedding model…")
+def _load_embedding_model(model_name):
+    return load_embedder(model_name)
+
+
+def get_embedder(model_name=""):
+    """
+    Local embedding model shared across reruns, or a fresh hashing embedder
+    (its IDF state is per index, so it is not shared).
+    """
+    return _load_embedding_model(model_name) if model_name else load_embedder()
+
+
+def _collect(articles, into):
+    """
+    Pass articles through unchanged, keeping each one's metadata for the Sources list.
+    """
+    for art in articles:
+        into.append(art)
+        yield art
+
+
 # Helper: fetch market data via yfinance
 def fetch_market_data():
     symbols = {
@@ -107,38 +159,174 @@ summarizes each with GPT, generates an executive overview, and then presents det
 
 # Sidebar controls
 max_per_cat = st.sidebar.slider("Max articles per category", 1, 10, 5)
-if st.sidebar.button("Fetch & Summarize"):
+lookback_hours = st.sidebar.slider("Lookback (hours)", 1, 72, 24)
+embedding_model = st.sidebar.text_input("Local embedding model (optional)", "",
+                                        help="A sentence-transformers model run on CPU, e.g. all-MiniLM-L6-v2; "
+                                             "blank uses the built-in hashed TF-IDF embedder")
+embedder = get_embedder(embedding_model.strip())
+cluster_threshold = st.sidebar.slider("Story grouping similarity", 0.05, 1.0, embedder.cluster_threshold, 0.01)
+exec_token_budget = st.sidebar.number_input("Executive summary input token budget", 1000, 100000, 12000, 1000)
+incremental = st.sidebar.checkbox("Incremental executive summary", value=True,
+                                  help="Only regenerate sectors with new or changed articles since today's last run")
+parse_workers = st.sidebar.number_input("HTML parse processes", 1, os.cpu_count() or 1, 1,
+                                        help="Above 1, category and article pages are parsed in a process pool (article pages are also fetched concurrently)")
+use_local = st.sidebar.checkbox("Summarize articles with a local model",
+                                help="Per-article summaries go to an OpenAI-compatible local server; the executive summary stays on the hosted model")
+if use_local:
+    local_url = st.sidebar.text_input("Local server URL", "http://localhost:8080/v1")
+    local_model = st.sidebar.text_input("Local model", "local")
+    local_batch = st.sidebar.number_input("Local batch size", 1, 64, 8)
+    # Built per rerun and passed down explicitly: the agents' default backends are shared by all sessions
+    summarize_backend = LocalBackend(local_model, local_url, max_workers=local_batch)
+else:
+    summarize_backend = HOSTED
+budgeted = st.sidebar.checkbox("Run within a time/cost budget")
+if budgeted:
+    deadline_min = st.sidebar.number_input("Deadline (minutes)", 1, 240, 10)
+    max_calls = st.sidebar.number_input("Max LLM calls", 2, 1000, 60)
+    max_tokens = st.sidebar.number_input("Max LLM tokens", 5000, 5000000, 150000, 5000)
+backfill = st.sidebar.checkbox("Backfill a past date range")
+start_date = end_date = None
+if backfill:
+    picked = st.sidebar.date_input(
+        "Date range (IST)",
+        value=(pd.Timestamp.now(tz=IST).date() - timedelta(days=7), pd.Timestamp.now(tz=IST).date())
+    )
+    # Streamlit returns a 1-tuple while only the start of the range has been picked
+    if len(picked) == 2:
+        start_date, end_date = picked
+    else:
+        st.sidebar.warning("Pick an end date to backfill.")
+if st.sidebar.button("Fetch & Summarize", disabled=backfill and end_date is None):
+    # Parses listing and article pages in worker processes when enabled
+    parse_pool = ParsePool(parse_workers) if parse_workers > 1 else None
+
     # 1. Fetch
-    with st.spinner("Fetching recent articles…"):
-        raw_articles = fetch_et_articles(max_articles_per_category=max_per_cat)
-    st.success(f"Fetched {len(raw_articles)} articles (up to {max_per_cat}/category).")
+    if backfill:
+        # The end date is inclusive in the UI, the window is [since, until)
+        since, until = resolve_window(start_date, end_date + timedelta(days=1))
+        with st.spinner(f"Backfilling archives {start_date} → {end_date}…"):
+            # Apply the per-category limit to each day of the range
+            raw_articles = []
+            for day, day_articles in group_by_day(fetch_et_backfill(since, until, parse_pool=parse_pool)).items():
+                per_category = {}
+                for art in day_articles:
+                    per_category.setdefault(art['category'], []).append(art)
+                raw_articles += [art for arts in per_category.values() for art in arts[-max_per_cat:]]
+            raw_articles.sort(key=lambda art: art['published'], reverse=True)
+    elif budgeted:
+        # The planner ranks the whole candidate set, so it has to be fetched up front
+        since, until = resolve_window(lookback=timedelta(hours=lookback_hours))
+        with st.spinner("Fetching recent articles…"):
+            raw_articles = list(iter_et_articles(max_articles_per_category=max_per_cat, since=since, until=until,
+                                                 parse_pool=parse_pool))
+    else:
+        # Stream category pages straight into the pipeline; raw_articles fills up as they are parsed
+        since, until = resolve_window(lookback=timedelta(hours=lookback_hours))
+        raw_articles = []
+        fetched = _collect(iter_et_articles(max_articles_per_category=max_per_cat, since=since, until=until,
+                                            parse_pool=parse_pool), raw_articles)
+    window_text = f"published {since.astimezone(IST):%d %b %H:%M} – {until.astimezone(IST):%d %b %H:%M} IST"
+    if backfill or budgeted:
+        st.success(f"Fetched {len(raw_articles)} articles (up to {max_per_cat}/category) {window_text}.")
+
+    # Budget mode: rank articles and decide full-text vs snippet-only summaries up front
+    if budgeted:
+        tracker = BudgetTracker(RunBudget(deadline_min * 60, max_calls, max_tokens))
+        planned, prediction = plan_run(raw_articles, tracker.budget, tracker.stats)
+        st.info(f"Budget plan: {prediction['full']} full + {prediction['snippet']} snippet summaries, "
+                f"{prediction['skipped']} skipped · predicted {prediction['seconds'] / 60:.1f} min, "
+                f"{prediction['calls']} calls, {prediction['tokens']:,} tokens (≈${prediction['usd']:.3f})")
+        to_summarize = tracker.gate(planned)
+        summarize = tracker.wrap(summarize_agent)
+    else:
+        tracker = None
+        to_summarize = raw_articles if backfill else fetched
+        summarize = summarize_agent
 
-    # 2. Summarize individually
+    # 2. Summarize individually, streaming each article through fetch → extract → summarize → persist
     summaries = []
-    for art in raw_articles:
-        with st.spinner(f"Summarizing: {art['title'][:50]}…"):
-            full = fetch_full_text(art['url'])
-            try:
-                summ_json = json.loads(summarize_agent(art['title'], full))
-                summaries.append(summ_json)
-            except Exception as e:
-                print(f"❌ Failed to summarize '{art['title']}': {e}")
-                continue  # Skip this article in output
+    summarized_articles = []
+    progress = st.progress(0.0, text="Summarizing…")
+    try:
+        # Local backends summarize in batches; budget mode needs per-call accounting
+        batched = use_local and not budgeted
+        stream = stream_pipeline(to_summarize, summarize, parse_pool=parse_pool,
+                                 summarize_batch=summarize_batch if batched else None,
+                                 batch_size=local_batch if batched else 1, backend=summarize_backend,
+                                 on_drop=tracker.release if tracker is not None else None)
+        for i, (art, summ_json) in enumerate(stream, 1):
+            # The URL identifies the article for incremental executive refreshes
+            summaries.append(dict(summ_json, url=art['url']))
+            summarized_articles.append(art)
+            progress.progress(min(i / max(len(raw_articles), 1), 1.0),
+                              text=f"Summarized {i} of {len(raw_articles)} fetched: {art['title'][:50]}…")
+    finally:
+        if parse_pool is not None:
+            parse_pool.close()
+    progress.empty()
+    HEALTH.save()
+    if not (backfill or budgeted):
+        st.success(f"Fetched {len(raw_articles)} articles (up to {max_per_cat}/category) {window_text}.")
     if not summaries:
         st.error("No summaries generated. Check your fetchers or API key.")
         st.stop()
     st.success(f"Generated {len(summaries)} summaries.")
 
+    # Index summaries and collapse related coverage into one representative per theme
+    try:
+        index = SummaryIndex(embedder=embedder)
+        vecs = index.add(summaries, extra=[
+            {'url': art['url'], 'published': art['published'].isoformat()} for art in summarized_articles
+        ])
+        exec_input = cluster_representatives(summaries, vecs, threshold=cluster_threshold)
+    except Exception as e:
+        print(f"⚠️ Summary index unavailable: {e}")
+        exec_input = summaries
+    st.caption(f"{len(summaries)} summaries grouped into {len(exec_input)} themes.")
+
     # 3. Executive Summary
     with st.expander("Executive Summary: 1-Page Overview of Key Articles with Sector Insights", expanded=False):
         # st.subheader("Live Market Update")
         # mkt_df = fetch_market_data()
         # st.dataframe(mkt_df)
-        exec_md = executive_summary_agent(json.dumps(summaries, indent=2))
+        routed = route_by_sector(exec_input)
+        # In budget mode every executive call (one per changed sector when incremental) is booked
+        exec_backend = tracker.wrap_backend(HOSTED) if tracker is not None else None
+        if incremental and not backfill:
+            exec_md, changed = refresh_executive(routed, token_budget=exec_token_budget, backend=exec_backend)
+            if changed is not None:
+                st.caption(f"Incremental refresh: {len(changed)} sector section(s) updated"
+                           + (f" ({', '.join(changed)})" if changed else ""))
+        else:
+            exec_prompt = encode_summaries(routed, token_budget=exec_token_budget)
+            print(f"📏 Executive prompt: {estimate_tokens(exec_prompt)} tokens "
+                  f"(pretty JSON would be {estimate_tokens(json.dumps(exec_input, indent=2))})")
+            exec_md = executive_summary_agent(exec_prompt, backend=exec_backend)
         # Escape dollar signs to prevent markdown math/font issues
         safe_exec_md = exec_md.replace("$", "\\$")
         st.markdown(safe_exec_md)
 
+    # Summaries were archived as they streamed; only the executive summary remains.
+    # A backfill's summary spans several past days, so it is not filed under today's partition.
+    if not backfill:
+        try:
+            archive_run([], summarized_articles, exec_md)
+        except Exception as e:
+            print(f"⚠️ Failed to archive run: {e}")
+
+    if tracker is not None:
+        actual = tracker.actual()
+        article_health = HEALTH.sources.get(ARTICLE_SOURCE)
+        tracker.update_stats(fetch_s=article_health.latency_ewma if article_health else None)
+        cols = st.columns(4)
+        cols[0].metric("Time (min)", f"{actual['seconds'] / 60:.1f}", f"{(actual['seconds'] - prediction['seconds']) / 60:+.1f} vs plan", delta_color="inverse")
+        cols[1].metric("LLM calls", actual['calls'], f"{actual['calls'] - prediction['calls']:+d} vs plan", delta_color="inverse")
+        cols[2].metric("Tokens", f"{actual['tokens']:,}", f"{actual['tokens'] - prediction['tokens']:+,} vs plan", delta_color="inverse")
+        cols[3].metric("Cost (USD)", f"{actual['usd']:.3f}", f"{actual['usd'] - prediction['usd']:+.3f} vs plan", delta_color="inverse")
+        if actual['degraded']:
+            st.caption(f"{actual['degraded']} article(s) downgraded to snippet-only summaries to stay within budget.")
+
     # 4. Summary of Articles (3-4 bullets each, no outlook or metadata)
     with st.expander("Summary of Articles", expanded=False):
         for summ in summaries:
@@ -157,4 +345,29 @@ if st.sidebar.button("Fetch & Summarize"):
             st.write(f"- [{safe_art_title}]({art['url']})")
 
 else:
-    st.info("Click **Fetch & Summarize** in the sidebar to run the pipeline.")
\ No newline at end of file
+    st.info("Click **Fetch & Summarize** in the sidebar to run the pipeline.")
+
+# Scraping health and circuit breaker state per source
+health_rows = HEALTH.report()
+if health_rows:
+    unhealthy = sum(r['state'] != 'ok' for r in health_rows)
+    with st.expander(f"Source Health ({unhealthy} of {len(health_rows)} sources degraded or skipped)", expanded=False):
+        st.dataframe(pd.DataFrame(health_rows), hide_index=True)
+        if st.button("Reset circuit breakers"):
+            HEALTH.reset()
+            HEALTH.save()
+
+# Sentiment analytics over the archive (no LLM calls)
+days = archived_days()
+if days:
+    with st.expander("Sector Sentiment vs Market Returns", expanded=False):
+        horizon = st.slider("Return horizon (trading days)", 1, 10, 1)
+        window = st.slider("Rolling window (trading days)", 5, 60, 20)
+        report = load_sentiment_report(days[0], days[-1], horizon, window)
+        st.caption(f"{len(days)} archived days, {days[0]} → {days[-1]}")
+        st.subheader("Daily sentiment by sector")
+        st.dataframe(report['score'].style.format("{:+.2f}", na_rep=""))
+        st.subheader("Hit rate (sentiment sign vs forward return sign)")
+        st.dataframe(report['hit_rate'].rename("Hit rate").to_frame().style.format("{:.0%}", na_rep="–"))
+        st.subheader(f"{window}-day rolling correlation")
+        st.line_chart(report['correlation'].dropna(how="all"))
@@ -0,0 +1,186 @@
+import os
+import uuid
+from datetime import datetime, timezone
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from Fetchers import IST
+
+# Default root of the Parquet archive (one hive partition per IST day)
+ARCHIVE_DIR = os.path.join("data", "archive")
+
+SUMMARY_SCHEMA = pa.schema([
+    ("run_ts", pa.timestamp("s", tz="UTC")),
+    ("title", pa.string()),
+    ("url", pa.string()),
+    ("published", pa.timestamp("s", tz="UTC")),
+    ("summary", pa.list_(pa.string())),
+    ("impact", pa.string()),
+    ("affected", pa.list_(pa.dictionary(pa.int32(), pa.string()))),
+    ("tone", pa.dictionary(pa.int8(), pa.string())),
+])
+
+EXECUTIVE_SCHEMA = pa.schema([
+    ("run_ts", pa.timestamp("s", tz="UTC")),
+    ("markdown", pa.string()),
+    ("sources", pa.list_(pa.string())),
+])
+
+_PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(v) for v in value]
+
+
+def _day(value):
+    """
+    Normalise a date/datetime/ISO string to the 'YYYY-MM-DD' partition key (IST).
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value[:10]
+    if isinstance(value, datetime):
+        if value.tzinfo:
+            value = value.astimezone(IST)
+        return value.date().isoformat()
+    return value.isoformat()
+
+
+def _write_partition(table, kind, day, path):
+    part_dir = os.path.join(path, kind, f"date={day}")
+    os.makedirs(part_dir, exist_ok=True)
+    # One new file per run keeps the archive append-only
+    pq.write_table(table, os.path.join(part_dir, f"part-{uuid.uuid4().hex}.parquet"), compression="zstd")
+
+
+def archive_run(summaries, articles, exec_md=None, run_date=None, path=ARCHIVE_DIR):
+    """
+    Append one run's summaries and executive summary to the archive.
+
+    Args:
+        summaries (list): Summary dicts from summarize_agent.
+        articles (list): Source article dicts aligned with summaries (url, published).
+        exec_md (str): Executive summary markdown, if generated.
+        run_date (date): Partition date for everything. Defaults to each article's
+            publish day for summaries and today (IST) for the executive summary.
+        path (str): Archive root.
+    """
+    run_ts = datetime.now(timezone.utc).replace(microsecond=0)
+    run_day = _day(run_date) or run_ts.astimezone(IST).date().isoformat()
+
+    # Summaries land in the partition of their article's publish day (IST)
+    partitions = {}
+    for summ, art in zip(summaries, articles):
+        day = _day(run_date or art.get("published")) or run_day
+        rows = partitions.setdefault(day, {name: [] for name in SUMMARY_SCHEMA.names})
+        rows["run_ts"].append(run_ts)
+        rows["title"].append(summ.get("title") or art.get("title"))
+        rows["url"].append(art.get("url"))
+        rows["published"].append(art.get("published"))
+        rows["summary"].append(_as_list(summ.get("summary")))
+        rows["impact"].append(summ.get("impact"))
+        rows["affected"].append(_as_list(summ.get("affected")))
+        rows["tone"].append(summ.get("tone"))
+    for day, rows in partitions.items():
+        _write_partition(pa.table(rows, schema=SUMMARY_SCHEMA), "summaries", day, path)
+
+    if exec_md:
+        table = pa.table({
+            "run_ts": [run_ts],
+            "markdown": [exec_md],
+            "sources": [[art.get("url") for art in articles]],
+        }, schema=EXECUTIVE_SCHEMA)
+        _write_partition(table, "executive", run_day, path)
+
+
+def _dataset(kind, path):
+    root = os.path.join(path, kind)
+    if not os.path.isdir(root):
+        return None
+    return ds.dataset(root, format="parquet", partitioning=_PARTITIONING)
+
+
+def _date_filter(since, until):
+    expr = None
+    if since is not None:
+        expr = ds.field("date") >= _day(since)
+    if until is not None:
+        upper = ds.field("date") < _day(until)
+        expr = upper if expr is None else expr & upper
+    return expr
+
+
+def query_summaries(since=None, until=None, columns=None, tone=None, sector=None, stock=None,
+                    path=ARCHIVE_DIR):
+    """
+    Query archived summaries over a [since, until) date range.
+
+    Only the requested columns and matching date partitions are read. Articles
+    archived by several overlapping runs are returned once, from the latest run.
+
+    Args:
+        since, until (date|str): Partition date bounds (IST days).
+        columns (list): Columns to return. Defaults to all.
+        tone (str|list): Keep rows with this tone (or any of these tones).
+        sector (str): Case-insensitive substring matched against `affected`.
+        stock (str): Same as sector; the summariser mixes sectors and stocks in `affected`.
+        path (str): Archive root.
+
+    Returns:
+        pd.DataFrame with a `date` column plus the requested columns.
+    """
+    dataset = _dataset("summaries", path)
+    wanted = list(columns) if columns else SUMMARY_SCHEMA.names
+    if dataset is None:
+        return pd.DataFrame(columns=["date"] + wanted)
+
+    needles = [n.lower() for n in (sector, stock) if n]
+    read_cols = list(dict.fromkeys(["date"] + wanted + ["url", "run_ts"] + (["affected"] if needles else [])
+                                   + (["tone"] if tone else [])))
+
+    df = dataset.to_table(columns=read_cols, filter=_date_filter(since, until)).to_pandas()
+    # Each refresh re-archives the overlapping lookback window: keep one row per URL.
+    # Row filters apply after this so an older run cannot stand in for the latest one.
+    df = df.sort_values("run_ts", kind="stable")
+    df = df[df["url"].isna() | ~df["url"].duplicated(keep="last")].sort_index()
+    if tone:
+        tones = [tone] if isinstance(tone, str) else list(tone)
+        df = df[df["tone"].astype(str).isin(tones)]
+    if needles and not df.empty:
+        affected = df["affected"].map(lambda items: " | ".join(items).lower() if items is not None else "")
+        for needle in needles:
+            df = df[affected[df.index].str.contains(needle, regex=False)]
+    return df[["date"] + wanted].reset_index(drop=True)
+
+
+def load_executive(day=None, path=ARCHIVE_DIR):
+    """
+    Return the most recent executive summary markdown archived for a day (default: today IST).
+    """
+    dataset = _dataset("executive", path)
+    if dataset is None:
+        return None
+    day = _day(day) or datetime.now(IST).date().isoformat()
+    table = dataset.to_table(columns=["run_ts", "markdown"], filter=ds.field("date") == day)
+    if table.num_rows == 0:
+        return None
+    df = table.to_pandas().sort_values("run_ts")
+    return df["markdown"].iloc[-1]
+
+
+def archived_days(path=ARCHIVE_DIR):
+    """
+    List archived partition dates, oldest first.
+    """
+    root = os.path.join(path, "summaries")
+    if not os.path.isdir(root):
+        return []
+    return sorted(d.split("=", 1)[1] for d in os.listdir(root) if d.startswith("date="))
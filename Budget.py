@@ -0,0 +1,307 @@
+import json
+import math
+import os
+import time
+from datetime import datetime, timezone
+
+from Classifier import classify
+from Encoding import estimate_tokens
+
+# Persisted per-call cost estimates, refined after every run
+RUN_STATS_PATH = os.path.join("data", "run_stats.json")
+
+# gpt-4.1-nano list prices, USD per million tokens
+PRICE_PER_M_INPUT = 0.10
+PRICE_PER_M_OUTPUT = 0.40
+
+# Characters of article text sent in snippet-only mode
+SNIPPET_CHARS = 800
+
+# Priors used until a few runs have been observed
+DEFAULT_STATS = {
+    "fetch_s": 1.0,              # article page fetch + extraction
+    "full_call_s": 6.0,          # summarize_agent on a full article
+    "snippet_call_s": 3.0,       # summarize_agent on a snippet
+    "full_input_tokens": 1800,
+    "snippet_input_tokens": 450,
+    "output_tokens": 350,
+    "exec_call_s": 25.0,         # executive summary step, all of its calls together
+    "exec_calls": 1,             # 1 for a full regeneration, more for incremental refreshes
+    "exec_input_tokens": 6000,
+    "exec_output_tokens": 1500,
+}
+
+# Weight of each category in the ranking; categories not listed weigh 1.0
+CATEGORY_PRIORITY = {
+    "news/economy/indicators": 1.6,
+    "news/economy/foreign-trade": 1.3,
+    "markets/stocks/earnings": 1.5,
+    "banking": 1.4,
+    "news/international/business": 1.2,
+    "energy/oil-gas": 1.2,
+}
+
+
+def load_stats(path=RUN_STATS_PATH):
+    stats = dict(DEFAULT_STATS)
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                stats.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+    return stats
+
+
+def save_stats(stats, path=RUN_STATS_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(stats, f, indent=1)
+
+
+def category_priority(category_url):
+    for fragment, weight in CATEGORY_PRIORITY.items():
+        if category_url and fragment in category_url:
+            return weight
+    return 1.0
+
+
+def relevance(article):
+    """
+    Cheap relevance from the local classifier: named stocks and sectors in the title.
+    """
+    tags = classify(article.get("title", ""))
+    return 1.0 + 0.5 * min(len(tags["tickers"]), 3) + 0.25 * len(tags["sectors"])
+
+
+def score(article, now=None, half_life_h=12.0):
+    """
+    Ranking score: recency (exponential decay) x category priority x relevance.
+    """
+    now = now or datetime.now(timezone.utc)
+    published = article.get("published")
+    age_h = max((now - published).total_seconds() / 3600, 0) if published else 24.0
+    recency = math.pow(0.5, age_h / half_life_h)
+    return recency * category_priority(article.get("category")) * relevance(article)
+
+
+def _cost(stats, mode):
+    """
+    Predicted (seconds, calls, tokens, usd) for one article in `mode`.
+    """
+    tin = stats[f"{mode}_input_tokens"]
+    tout = stats["output_tokens"]
+    usd = (tin * PRICE_PER_M_INPUT + tout * PRICE_PER_M_OUTPUT) / 1e6
+    return stats["fetch_s"] + stats[f"{mode}_call_s"], 1, tin + tout, usd
+
+
+def _exec_cost(stats):
+    tin, tout = stats["exec_input_tokens"], stats["exec_output_tokens"]
+    return (stats["exec_call_s"], math.ceil(stats["exec_calls"]), tin + tout,
+            (tin * PRICE_PER_M_INPUT + tout * PRICE_PER_M_OUTPUT) / 1e6)
+
+
+class RunBudget:
+    """
+    Limits for one run. Any limit left as None is unbounded.
+    """
+
+    def __init__(self, deadline_s=None, max_calls=None, max_tokens=None):
+        self.deadline_s = deadline_s
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+
+    def fits(self, seconds, calls, tokens):
+        return ((self.deadline_s is None or seconds <= self.deadline_s)
+                and (self.max_calls is None or calls <= self.max_calls)
+                and (self.max_tokens is None or tokens <= self.max_tokens))
+
+
+def plan_run(articles, budget, stats=None):
+    """
+    Choose which articles to summarize and how, best first.
+
+    Articles are ranked by score(); each is given a full-text summary while the
+    predicted totals (including the executive summary) fit the budget, then a
+    snippet-only summary, and is skipped once neither fits.
+
+    Returns:
+        tuple: (planned, prediction). planned is the ranked list of articles
+        with a 'mode' key ('full' or 'snippet'); prediction is a dict with
+        seconds, calls, tokens, usd and the number of full/snippet/skipped articles.
+    """
+    stats = stats or load_stats()
+    now = datetime.now(timezone.utc)
+    ranked = sorted(articles, key=lambda art: score(art, now), reverse=True)
+    total = list(_exec_cost(stats))
+    planned, counts = [], {"full": 0, "snippet": 0, "skipped": 0}
+    for art in ranked:
+        for mode in ("full", "snippet"):
+            cost = _cost(stats, mode)
+            candidate = [t + c for t, c in zip(total, cost)]
+            if budget.fits(*candidate[:3]):
+                total = candidate
+                planned.append(dict(art, mode=mode))
+                counts[mode] += 1
+                break
+        else:
+            counts["skipped"] += 1
+    prediction = {"seconds": round(total[0], 1), "calls": total[1], "tokens": int(total[2]),
+                  "usd": round(total[3], 4), **counts}
+    return planned, prediction
+
+
+class BudgetTracker:
+    """
+    Enforces a RunBudget while the pipeline runs and records actual usage.
+
+    gate() sits in front of the pipeline: it downgrades articles to snippet mode
+    when the remaining budget can no longer afford a full summary, and stops
+    the stream once not even a snippet fits. Articles it has let through but
+    that are not summarized yet (e.g. a batch pulled ahead by a ParsePool) are
+    reserved at their predicted cost, so read-ahead cannot overspend the budget.
+    Reservations are settled by the article's summarize call, or by release()
+    when the article is dropped on the way.
+    """
+
+    def __init__(self, budget, stats=None):
+        self.budget = budget
+        self.stats = stats or load_stats()
+        self.start = time.monotonic()
+        self.calls = 0
+        self.tokens = 0
+        self.usd = 0.0
+        self.degraded = 0
+        self.reserved = {"full": 0, "snippet": 0}
+        self.samples = {"full": [], "snippet": [], "exec": []}
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def _affordable(self, mode):
+        seconds, calls, tokens = self.elapsed, self.calls, self.tokens
+        pending = dict(self.reserved)
+        pending[mode] += 1
+        for pending_mode, n in pending.items():
+            s, c, t, _ = _cost(self.stats, pending_mode)
+            seconds, calls, tokens = seconds + n * s, calls + n * c, tokens + n * t
+        exec_s, exec_calls, exec_tokens, _ = _exec_cost(self.stats)
+        return self.budget.fits(seconds + exec_s, calls + exec_calls, tokens + exec_tokens)
+
+    def gate(self, articles):
+        for art in articles:
+            mode = art.get("mode", "full")
+            if mode == "full" and not self._affordable("full"):
+                mode = "snippet"
+            if not self._affordable("snippet"):
+                return
+            if mode != art.get("mode", "full"):
+                self.degraded += 1
+            self.reserved[mode] += 1
+            yield dict(art, mode=mode)
+
+    def wrap(self, agent):
+        """
+        Wrap an agent(title, text, **kw) so every call's latency and tokens are recorded.
+        """
+        def wrapped(title, text, **kwargs):
+            mode = "snippet" if len(text) <= SNIPPET_CHARS else "full"
+            start = time.monotonic()
+            try:
+                out = agent(title, text, **kwargs)
+            except Exception:
+                self._release(mode)
+                raise
+            self.record_call(estimate_tokens(title + text) + 200, estimate_tokens(out), time.monotonic() - start, mode)
+            return out
+        return wrapped
+
+    def wrap_backend(self, backend, mode="exec"):
+        """
+        Wrap a model backend so every completion it makes is recorded under `mode`,
+        e.g. the executive summary step, however many calls it takes.
+        """
+        return RecordingBackend(backend, self, mode)
+
+    def record_call(self, input_tokens, output_tokens, seconds, mode=None):
+        self.calls += 1
+        self.tokens += input_tokens + output_tokens
+        self.usd += (input_tokens * PRICE_PER_M_INPUT + output_tokens * PRICE_PER_M_OUTPUT) / 1e6
+        if mode in self.samples:
+            self.samples[mode].append((input_tokens, output_tokens, seconds))
+        if mode in self.reserved:
+            self._release(mode)
+
+    def release(self, article):
+        """
+        Give back the reservation of an article gate() let through but that was
+        dropped before summarizing (failed fetch, empty body); see Pipeline's on_drop.
+        """
+        self._release(article.get("mode", "full"))
+
+    def _release(self, mode):
+        """
+        Settle a reservation made by gate(), preferring one of the same mode.
+        """
+        settle = mode if self.reserved[mode] else next((m for m, n in self.reserved.items() if n), None)
+        if settle:
+            self.reserved[settle] -= 1
+
+    def actual(self):
+        return {"seconds": round(self.elapsed, 1), "calls": self.calls, "tokens": self.tokens,
+                "usd": round(self.usd, 4), "degraded": self.degraded}
+
+    def update_stats(self, fetch_s=None, alpha=0.3, path=RUN_STATS_PATH):
+        """
+        Blend this run's observed per-call costs (and optionally the article
+        fetch latency) into the persisted estimates.
+        """
+        def blend(key, value):
+            self.stats[key] = round((1 - alpha) * self.stats[key] + alpha * value, 3)
+
+        if fetch_s is not None:
+            blend("fetch_s", fetch_s)
+        if self.samples["exec"]:
+            # The executive step is predicted as a whole: sum over its calls
+            samples = self.samples["exec"]
+            blend("exec_input_tokens", sum(s[0] for s in samples))
+            blend("exec_output_tokens", sum(s[1] for s in samples))
+            blend("exec_call_s", sum(s[2] for s in samples))
+            blend("exec_calls", len(samples))
+        outputs = []
+        for mode in ("full", "snippet"):
+            samples = self.samples[mode]
+            if samples:
+                blend(f"{mode}_input_tokens", sum(s[0] for s in samples) / len(samples))
+                blend(f"{mode}_call_s", sum(s[2] for s in samples) / len(samples))
+                outputs += [s[1] for s in samples]
+        if outputs:
+            blend("output_tokens", sum(outputs) / len(outputs))
+        save_stats(self.stats, path)
+
+
+class RecordingBackend:
+    """
+    Model backend proxy that books each completion against a BudgetTracker.
+    """
+
+    def __init__(self, backend, tracker, mode):
+        self.backend = backend
+        self.tracker = tracker
+        self.mode = mode
+
+    def complete(self, prompt, temperature=0.4):
+        start = time.monotonic()
+        out = self.backend.complete(prompt, temperature)
+        self.tracker.record_call(estimate_tokens(prompt), estimate_tokens(out), time.monotonic() - start, self.mode)
+        return out
+
+    def complete_batch(self, prompts, temperature=0.4):
+        start = time.monotonic()
+        outs = self.backend.complete_batch(prompts, temperature)
+        seconds = (time.monotonic() - start) / max(len(prompts), 1)
+        for prompt, out in zip(prompts, outs):
+            if not isinstance(out, Exception):
+                self.tracker.record_call(estimate_tokens(prompt), estimate_tokens(out), seconds, self.mode)
+        return outs
@@ -0,0 +1,280 @@
+from collections import Counter, deque
+from functools import lru_cache
+
+from Analytics import SECTORS, SECTOR_KEYWORDS
+
+# NSE symbol -> (sector, aliases). Aliases are matched case-insensitively on word boundaries.
+COMPANIES = {
+    "RELIANCE": ("Power & Energy", ["reliance industries", "ril", "reliance"]),
+    "ONGC": ("Power & Energy", ["ongc", "oil and natural gas corporation"]),
+    "IOC": ("Power & Energy", ["indian oil", "ioc"]),
+    "BPCL": ("Power & Energy", ["bpcl", "bharat petroleum"]),
+    "NTPC": ("Power & Energy", ["ntpc"]),
+    "POWERGRID": ("Power & Energy", ["power grid", "powergrid"]),
+    "TATAPOWER": ("Power & Energy", ["tata power"]),
+    "ADANIGREEN": ("Power & Energy", ["adani green"]),
+    "COALINDIA": ("Power & Energy", ["coal india"]),
+    "HDFCBANK": ("Banking & Financial Services", ["hdfc bank"]),
+    "ICICIBANK": ("Banking & Financial Services", ["icici bank"]),
+    "SBIN": ("Banking & Financial Services", ["state bank of india", "sbi"]),
+    "KOTAKBANK": ("Banking & Financial Services", ["kotak mahindra bank", "kotak bank"]),
+    "AXISBANK": ("Banking & Financial Services", ["axis bank"]),
+    "INDUSINDBK": ("Banking & Financial Services", ["indusind bank"]),
+    "BAJFINANCE": ("Banking & Financial Services", ["bajaj finance"]),
+    "BAJAJFINSV": ("Banking & Financial Services", ["bajaj finserv"]),
+    "HDFCLIFE": ("Banking & Financial Services", ["hdfc life"]),
+    "SBILIFE": ("Banking & Financial Services", ["sbi life"]),
+    "LICI": ("Banking & Financial Services", ["life insurance corporation", "lic"]),
+    "TCS": ("IT & Telecom", ["tata consultancy services", "tcs"]),
+    "INFY": ("IT & Telecom", ["infosys"]),
+    "WIPRO": ("IT & Telecom", ["wipro"]),
+    "HCLTECH": ("IT & Telecom", ["hcl technologies", "hcltech", "hcl tech"]),
+    "TECHM": ("IT & Telecom", ["tech mahindra"]),
+    "LTIM": ("IT & Telecom", ["ltimindtree"]),
+    "BHARTIARTL": ("IT & Telecom", ["bharti airtel", "airtel"]),
+    "IDEA": ("IT & Telecom", ["vodafone idea"]),
+    "TATASTEEL": ("Metals and Chemicals", ["tata steel"]),
+    "JSWSTEEL": ("Metals and Chemicals", ["jsw steel"]),
+    "HINDALCO": ("Metals and Chemicals", ["hindalco"]),
+    "VEDL": ("Metals and Chemicals", ["vedanta"]),
+    "SAIL": ("Metals and Chemicals", ["steel authority of india", "sail"]),
+    "UPL": ("Metals and Chemicals", ["upl"]),
+    "PIDILITIND": ("Metals and Chemicals", ["pidilite"]),
+    "LT": ("Infrastructure", ["larsen & toubro", "larsen and toubro", "l&t"]),
+    "ADANIPORTS": ("Infrastructure", ["adani ports"]),
+    "IRB": ("Infrastructure", ["irb infrastructure"]),
+    "ULTRACEMCO": ("Industrial Goods", ["ultratech cement", "ultratech"]),
+    "GRASIM": ("Industrial Goods", ["grasim"]),
+    "SIEMENS": ("Industrial Goods", ["siemens"]),
+    "BEL": ("Industrial Goods", ["bharat electronics"]),
+    "HAL": ("Industrial Goods", ["hindustan aeronautics"]),
+    "HINDUNILVR": ("Consumer Goods", ["hindustan unilever", "hul"]),
+    "ITC": ("Consumer Goods", ["itc"]),
+    "NESTLEIND": ("Consumer Goods", ["nestle india"]),
+    "BRITANNIA": ("Consumer Goods", ["britannia"]),
+    "TATACONSUM": ("Consumer Goods", ["tata consumer"]),
+    "ASIANPAINT": ("Consumer Goods", ["asian paints"]),
+    "TITAN": ("Consumer Goods", ["titan"]),
+    "DMART": ("Consumer Goods", ["avenue supermarts", "dmart"]),
+    "TRENT": ("Consumer Goods", ["trent"]),
+    "DLF": ("Real Estate", ["dlf"]),
+    "GODREJPROP": ("Real Estate", ["godrej properties"]),
+    "OBEROIRLTY": ("Real Estate", ["oberoi realty"]),
+    "INDIGO": ("Services", ["interglobe aviation", "indigo"]),
+    "ZOMATO": ("Services", ["zomato"]),
+    "SUNPHARMA": ("Pharma", ["sun pharma", "sun pharmaceutical"]),
+    "DRREDDY": ("Pharma", ["dr reddy's", "dr reddys", "dr. reddy's"]),
+    "CIPLA": ("Pharma", ["cipla"]),
+    "DIVISLAB": ("Pharma", ["divi's laboratories", "divis lab"]),
+    "APOLLOHOSP": ("Pharma", ["apollo hospitals"]),
+    "MARUTI": ("Auto", ["maruti suzuki", "maruti"]),
+    "TATAMOTORS": ("Auto", ["tata motors"]),
+    "M&M": ("Auto", ["mahindra & mahindra", "mahindra and mahindra", "m&m"]),
+    "BAJAJ-AUTO": ("Auto", ["bajaj auto"]),
+    "HEROMOTOCO": ("Auto", ["hero motocorp"]),
+    "EICHERMOT": ("Auto", ["eicher motors", "royal enfield"]),
+}
+
+
+class AhoCorasick:
+    """
+    Minimal Aho-Corasick automaton: finds every occurrence of every pattern
+    in a single pass over the text.
+    """
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns (dict): pattern string -> payload returned on match.
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern, payload in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(pattern), payload))
+
+        # Breadth-first construction of failure links (depth-1 nodes fail to the root)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter(self, text):
+        """
+        Yield (start, end, payload) for each match in text.
+        """
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, payload in self._out[node]:
+                yield i - length + 1, i + 1, payload
+
+
+def _is_boundary(text, start, end, suffixes=("",)):
+    """
+    True if text[start:end] starts a word and the rest of that word is one of
+    `suffixes` (None accepts any ending, for stems).
+    """
+    if start > 0 and text[start - 1].isalnum():
+        return False
+    if suffixes is None:
+        return True
+    stop = end
+    while stop < len(text) and text[stop].isalnum():
+        stop += 1
+    return text[end:stop] in suffixes
+
+
+# Endings a whole-word keyword may take: plurals only
+PLURALS = ("", "s", "es")
+
+
+def _matches_case(original, start, keyword):
+    """
+    Capitalised letters in a keyword ("IT", "EV") must be capitalised in the text too,
+    so the pronoun "it" is not read as the IT sector.
+    """
+    return all(o == k for o, k in zip(original[start:start + len(keyword)], keyword) if k.isupper())
+
+
+@lru_cache(maxsize=1)
+def _automaton():
+    patterns = {}
+    for ticker, (sector, aliases) in COMPANIES.items():
+        for alias in aliases:
+            patterns[alias.lower()] = ("ticker", ticker, sector)
+    for sector, keywords in SECTOR_KEYWORDS.items():
+        for kw in keywords:
+            patterns.setdefault(kw.rstrip("*").lower(), ("keyword", kw, sector))
+    return AhoCorasick(patterns)
+
+
+def _scan(text):
+    """
+    Boundary-checked matches in text as (start, end, kind, key, sector), leftmost-longest:
+    a match inside a longer one ("services" in "IT services", "steel" in "tata steel") is dropped.
+    """
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Rare characters whose lowercase form is longer would shift offsets
+        lowered = "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+    found = []
+    for start, end, (kind, key, sector) in _automaton().iter(lowered):
+        if kind == "ticker":
+            if not _is_boundary(lowered, start, end):
+                continue
+        else:
+            if not _matches_case(text, start, key):
+                continue
+            # Stems ("financ*") take any ending; other keywords are whole words or plurals
+            if not _is_boundary(lowered, start, end, None if key.endswith("*") else PLURALS):
+                continue
+        found.append((start, end, kind, key, sector))
+    found.sort(key=lambda m: (m[0], m[0] - m[1]))
+    kept, covered = [], 0
+    for match in found:
+        if match[0] >= covered:
+            kept.append(match)
+            covered = match[1]
+        elif match[1] > covered:
+            # Overlaps the previous match without being inside it: keep the longer one
+            if match[1] - match[0] > kept[-1][1] - kept[-1][0]:
+                kept[-1] = match
+                covered = match[1]
+    return kept
+
+
+def classify(text, max_sectors=3, max_tickers=5, lead_chars=400):
+    """
+    Tag text with candidate sectors and NSE tickers from the alias index.
+
+    Mentions in the lead (the first `lead_chars` characters, where callers put
+    the title) weigh double, and repeated mentions of the same name or keyword
+    further down the body count only once.
+
+    Args:
+        text (str): Article title and/or body.
+        max_sectors (int): Number of sectors to return, strongest first.
+        max_tickers (int): Number of tickers to return, most mentioned first.
+        lead_chars (int): Length of the lead.
+
+    Returns:
+        dict: {'sectors': [...], 'tickers': [...]}
+    """
+    text = text or ""
+    sector_hits, ticker_hits = Counter(), Counter()
+    seen_in_body = set()
+    for start, end, kind, key, sector in _scan(text):
+        in_lead = start < lead_chars
+        if kind == "ticker":
+            ticker_hits[key] += 1
+        if not in_lead:
+            if (kind, key) in seen_in_body:
+                continue
+            seen_in_body.add((kind, key))
+        # A named company is stronger evidence than a sector keyword
+        sector_hits[sector] += (3 if kind == "ticker" else 1) * (2 if in_lead else 1)
+    return {
+        "sectors": [s for s, _ in sector_hits.most_common(max_sectors)],
+        "tickers": [t for t, _ in ticker_hits.most_common(max_tickers)],
+    }
+
+
+@lru_cache(maxsize=4096)
+def label_sectors(label):
+    """
+    Canonical sectors named by a short free-text label (an `affected` entry such as
+    "IT services" or "Tata Steel"), using the same word-boundary rules as classify().
+
+    Returns:
+        tuple: Matched sectors in order of first mention.
+    """
+    return tuple(dict.fromkeys(sector for *_, sector in _scan(label or "")))
+
+
+def format_hints(tags):
+    """
+    Compact one-line hint for agent prompts, e.g. 'sectors=Auto,Pharma; stocks=MARUTI'.
+    """
+    parts = []
+    if tags.get("sectors"):
+        parts.append("sectors=" + ",".join(tags["sectors"]))
+    if tags.get("tickers"):
+        parts.append("stocks=" + ",".join(tags["tickers"]))
+    return "; ".join(parts)
+
+
+def route_by_sector(summaries, unclassified="Macroeconomic Updates"):
+    """
+    Group summaries under their primary pre-classified sector, in executive summary order.
+
+    Args:
+        summaries (list): Summary dicts carrying a `sectors` list from classify().
+        unclassified (str): Section for summaries with no sector tags.
+
+    Returns:
+        dict: {sector: [summary, ...]} without the `sectors` field on each summary.
+    """
+    routed = {sector: [] for sector in SECTORS}
+    for summ in summaries:
+        sectors = summ.get("sectors") or [unclassified]
+        routed.setdefault(sectors[0], []).append({k: v for k, v in summ.items() if k != "sectors"})
+    return {sector: items for sector, items in routed.items() if items}
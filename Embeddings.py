@@ -0,0 +1,338 @@
+import json
+import os
+import re
+import zlib
+import numpy as np
+
+# Default on-disk location of the summary index
+INDEX_DIR = os.path.join("data", "summary_index")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[&.\-][a-z0-9]+)*")
+
+
+# Function words plus boilerplate shared by most business stories ("Rs ... crore")
+STOPWORDS = frozenset("""
+a about after against all also an and are as at be been before but by can could did do does for from had has
+have he her his how i if in into is it its may more most new no not of on or our over per said says she so
+than that the their them then there these they this those to under up was we were what when which while who
+will with would year years yoy qoq rs crore crores lakh cent percent mn bn billion million
+""".split())
+
+
+class HashingEmbedder:
+    """
+    Dependency-free fallback embedder: signed feature hashing of word unigrams
+    and bigrams (stopwords removed) with sublinear TF x IDF weighting, L2-normalised.
+    Hashing uses crc32 so vectors are stable across processes.
+
+    Document frequencies are accumulated per hash slot with fit() and are
+    persisted by SummaryIndex alongside the vectors.
+    """
+
+    def __init__(self, dim=1024):
+        self.dim = dim
+        self.name = f"hashing-tfidf-{dim}"
+        # Groups the two steel stories in fixtures/summaries_sample.json (0.19) but no unrelated pair (<= 0.15)
+        self.cluster_threshold = 0.17
+        self.doc_freq = np.zeros(dim, dtype=np.float64)
+        self.n_docs = 0
+
+    def _features(self, text):
+        # Bare numbers are dropped: figures rarely identify a story
+        tokens = [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and not t.isdigit()]
+        return tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]
+
+    def _counts(self, text):
+        counts = {}
+        for feat in self._features(text or ""):
+            h = zlib.crc32(feat.encode("utf-8"))
+            slot = h % self.dim
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            counts[slot] = counts.get(slot, 0.0) + sign
+        return counts
+
+    def fit(self, texts):
+        """
+        Add texts to the document frequencies used for IDF weighting.
+        """
+        for text in texts:
+            slots = np.fromiter(self._counts(text).keys(), dtype=np.int64)
+            self.doc_freq[slots] += 1
+            self.n_docs += 1
+
+    @property
+    def idf(self):
+        # Smoothed so unseen slots get the highest weight rather than dividing by zero
+        return (np.log((1.0 + self.n_docs) / (1.0 + self.doc_freq)) + 1.0).astype(np.float32)
+
+    def embed(self, texts):
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts (list): List of strings.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dim).
+        """
+        idf = self.idf
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = self._counts(text)
+            if counts:
+                slots = np.fromiter(counts.keys(), dtype=np.int64)
+                vals = np.fromiter(counts.values(), dtype=np.float32)
+                tf = np.sign(vals) * (1.0 + np.log(np.abs(vals) + 1e-12).clip(min=0))
+                out[row, slots] = tf * idf[slots]
+        return _normalize(out)
+
+
+class SentenceTransformerEmbedder:
+    """
+    Local CPU embedding model via sentence-transformers (optional dependency).
+    """
+
+    def __init__(self, model_name="all-MiniLM-L6-v2"):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = model_name
+        self.cluster_threshold = 0.6
+
+    def embed(self, texts, batch_size=64):
+        vecs = self.model.encode(list(texts), batch_size=batch_size, convert_to_numpy=True)
+        return _normalize(vecs.astype(np.float32))
+
+
+def load_embedder(model_name=None, dim=1024):
+    """
+    Return a local sentence-transformers embedder if installed and requested,
+    otherwise the hashing fallback.
+    """
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except Exception as e:
+            print(f"⚠️ Embedding model '{model_name}' unavailable ({e}); using hashing fallback")
+    return HashingEmbedder(dim)
+
+
+def _normalize(vecs):
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vecs / norms
+
+
+def summary_text(summ):
+    """
+    Text used to embed a summary dict: title, bullet points, impact and affected sectors/stocks.
+    """
+    bullets = summ.get("summary", [])
+    if isinstance(bullets, str):
+        bullets = [bullets]
+    affected = summ.get("affected") or []
+    if isinstance(affected, str):
+        affected = [affected]
+    return " ".join([summ.get("title", "")] + [str(b) for b in bullets]
+                    + [str(summ.get("impact") or "")] + [str(a) for a in affected])
+
+
+class SummaryIndex:
+    """
+    Append-only on-disk vector index over article summaries.
+
+    Layout under `path` (by default one directory per embedder under INDEX_DIR):
+      - vectors.f32: memory-mapped float32 matrix (capacity x dim)
+      - meta.jsonl: one metadata record per row
+      - index.json: dim, row count and embedder name
+      - doc_freq.npy: document frequencies, for embedders with IDF weighting
+    """
+
+    def __init__(self, path=None, embedder=None):
+        self.embedder = embedder or HashingEmbedder()
+        self.path = path or os.path.join(INDEX_DIR, re.sub(r"[^\w.\-]+", "_", self.embedder.name))
+        path = self.path
+        os.makedirs(path, exist_ok=True)
+        self._vec_path = os.path.join(path, "vectors.f32")
+        self._meta_path = os.path.join(path, "meta.jsonl")
+        self._info_path = os.path.join(path, "index.json")
+        self._df_path = os.path.join(path, "doc_freq.npy")
+
+        if os.path.exists(self._info_path):
+            with open(self._info_path) as f:
+                info = json.load(f)
+            if info["dim"] != self.embedder.dim or info["embedder"] != self.embedder.name:
+                raise ValueError(
+                    f"Index at {path} was built with {info['embedder']} ({info['dim']}d), "
+                    f"not {self.embedder.name} ({self.embedder.dim}d)"
+                )
+            self.count = info["count"]
+        else:
+            self.count = 0
+        self.dim = self.embedder.dim
+        self._meta = self._load_meta()
+        self._urls = {rec["url"] for rec in self._meta if rec.get("url")}
+        if hasattr(self.embedder, "fit") and os.path.exists(self._df_path):
+            self.embedder.doc_freq = np.load(self._df_path)
+            self.embedder.n_docs = self.count
+        self._mm = None
+        self._open(max(self.count, 1))
+
+    def _load_meta(self):
+        if not os.path.exists(self._meta_path):
+            return []
+        with open(self._meta_path) as f:
+            return [json.loads(line) for line in f][:self.count]
+
+    def _open(self, min_rows):
+        """
+        (Re)map the vector file, growing it geometrically to hold min_rows.
+        """
+        row_bytes = self.dim * 4
+        size = os.path.getsize(self._vec_path) if os.path.exists(self._vec_path) else 0
+        capacity = size // row_bytes
+        if capacity < min_rows:
+            capacity = max(min_rows, capacity * 2, 256)
+            if self._mm is not None:
+                self._mm.flush()
+                self._mm = None
+            with open(self._vec_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        if self._mm is None or self._mm.shape[0] != capacity:
+            self._mm = np.memmap(self._vec_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def vectors(self):
+        return self._mm[:self.count]
+
+    @property
+    def meta(self):
+        return self._meta
+
+    def add(self, summaries, extra=None):
+        """
+        Embed a batch of summary dicts and append those not already indexed.
+
+        Summaries whose `url` (from `extra`) is already in the index are embedded
+        but not stored again, so overlapping runs do not duplicate rows.
+
+        Args:
+            summaries (list): Summary dicts (title, summary, ...).
+            extra (list): Optional per-summary metadata (e.g. url, date) to store.
+
+        Returns:
+            np.ndarray: The embedded vectors for the whole batch, in input order.
+        """
+        if not summaries:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        texts = [summary_text(s) for s in summaries]
+        records, new_rows = [], []
+        for i, summ in enumerate(summaries):
+            rec = {"title": summ.get("title", ""), "tone": summ.get("tone")}
+            if extra:
+                rec.update(extra[i])
+            url = rec.get("url")
+            if url and url in self._urls:
+                continue
+            if url:
+                self._urls.add(url)
+            records.append(rec)
+            new_rows.append(i)
+
+        # New documents update IDF before embedding so the batch is weighted consistently
+        if new_rows and hasattr(self.embedder, "fit"):
+            self.embedder.fit([texts[i] for i in new_rows])
+            np.save(self._df_path, self.embedder.doc_freq)
+        vecs = self.embedder.embed(texts)
+        if not new_rows:
+            return vecs
+
+        start = self.count
+        self._open(start + len(new_rows))
+        self._mm[start:start + len(new_rows)] = vecs[new_rows]
+        self._mm.flush()
+        with open(self._meta_path, "a") as f:
+            for rec in records:
+                f.write(json.dumps(rec, default=str) + "\n")
+        self._meta.extend(records)
+        self.count += len(new_rows)
+        with open(self._info_path, "w") as f:
+            json.dump({"dim": self.dim, "count": self.count, "embedder": self.embedder.name}, f)
+        return vecs
+
+    def search(self, query, k=5):
+        """
+        Top-k cosine search.
+
+        Args:
+            query (str|np.ndarray): Query text or a pre-embedded vector.
+            k (int): Number of results.
+
+        Returns:
+            List of (score, metadata) tuples, best first.
+        """
+        if self.count == 0:
+            return []
+        qvec = self.embedder.embed([query])[0] if isinstance(query, str) else np.asarray(query, dtype=np.float32)
+        scores = self.vectors @ qvec
+        k = min(k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self._meta[i]) for i in top]
+
+
+def cluster_vectors(vecs, threshold=0.17):
+    """
+    Greedy leader clustering of L2-normalised vectors by cosine similarity.
+
+    Args:
+        vecs (np.ndarray): (n, dim) normalised vectors.
+        threshold (float): Minimum similarity to join an existing cluster.
+
+    Returns:
+        List of clusters, each a list of row indices with the most central
+        member (the representative) first. Larger clusters come first.
+    """
+    n = len(vecs)
+    if n == 0:
+        return []
+    sims = vecs @ vecs.T
+    labels = np.full(n, -1)
+    leaders = []
+    for i in range(n):
+        if leaders:
+            best = int(np.argmax(sims[i, leaders]))
+            if sims[i, leaders[best]] >= threshold:
+                labels[i] = best
+                continue
+        labels[i] = len(leaders)
+        leaders.append(i)
+
+    clusters = []
+    for c in range(len(leaders)):
+        members = np.flatnonzero(labels == c)
+        centrality = sims[np.ix_(members, members)].sum(axis=1)
+        clusters.append([int(m) for m in members[np.argsort(-centrality)]])
+    clusters.sort(key=len, reverse=True)
+    return clusters
+
+
+def cluster_representatives(summaries, vecs, threshold=0.17):
+    """
+    Collapse related summaries into one representative per cluster, annotated
+    with the titles of the related coverage it stands for and, when summaries
+    carry a `url`, the URLs of every member as `sources`.
+    """
+    reps = []
+    for members in cluster_vectors(vecs, threshold):
+        rep = dict(summaries[members[0]])
+        if len(members) > 1:
+            rep["related"] = [summaries[m].get("title", "") for m in members[1:]]
+        urls = [summaries[m]["url"] for m in members if summaries[m].get("url")]
+        if urls:
+            rep["sources"] = urls
+        reps.append(rep)
+    return reps
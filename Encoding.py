@@ -0,0 +1,153 @@
+import json
+import time
+
+TONE_CODES = {"bullish": "+", "bearish": "-", "neutral": "0"}
+
+COLUMNS = ["id", "tone", "affected", "title", "impact", "bullets"]
+
+
+def estimate_tokens(text):
+    """
+    Token count for a prompt string: tiktoken when installed, else ~4 chars/token.
+    """
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("o200k_base").encode(text))
+    except Exception:
+        return (len(text) + 3) // 4
+
+
+def _clean(value, max_chars=None):
+    text = " ".join(str(value or "").split()).replace("\t", " ")
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars - 1].rstrip() + "…"
+    return text
+
+
+def _bullets(summ):
+    bullets = summ.get("summary") or []
+    return [bullets] if isinstance(bullets, str) else list(bullets)
+
+
+def priority(summ):
+    """
+    Relative importance of a summary when trimming to a budget: clustered
+    stories, directional tone and named sectors/stocks rank higher.
+    """
+    score = 1.0 + len(summ.get("related") or [])
+    if str(summ.get("tone", "")).strip().lower() in ("bullish", "bearish"):
+        score += 0.5
+    return score + 0.1 * min(len(summ.get("affected") or []), 5)
+
+
+def _encode_rows(groups, max_bullets, max_title_chars):
+    labels = {}
+    lines = []
+    row_id = 0
+    for group, items in groups:
+        if group:
+            lines.append(f"## {group}")
+        for summ in items:
+            row_id += 1
+            affected = summ.get("affected") or []
+            if isinstance(affected, str):
+                affected = [affected]
+            ids = [str(labels.setdefault(_clean(a), len(labels))) for a in affected if _clean(a)]
+            tone = TONE_CODES.get(str(summ.get("tone", "")).strip().lower(), "?")
+            bullets = " / ".join(_clean(b) for b in _bullets(summ)[:max_bullets])
+            row = [str(row_id), tone, ",".join(ids), _clean(summ.get("title"), max_title_chars),
+                   _clean(summ.get("impact")), bullets]
+            if summ.get("related"):
+                row[3] += f" (+{len(summ['related'])} related)"
+            lines.append("\t".join(row))
+    legend = " | ".join(f"{i}={label}" for label, i in labels.items())
+    header = [
+        "# Article summaries, one tab-separated row per article.",
+        "# Columns: " + "\t".join(COLUMNS),
+        "# tone: + Bullish, - Bearish, 0 Neutral; bullets separated by ' / '; affected = ids below",
+        "# affected ids: " + legend,
+    ]
+    return "\n".join(header + lines)
+
+
+def encode_summaries(summaries, max_bullets=3, max_title_chars=100, token_budget=None):
+    """
+    Compact, tabular encoding of summaries for the aggregate/executive agents.
+
+    Args:
+        summaries (list|dict): Summary dicts, or {sector: [summary, ...]} from route_by_sector.
+        max_bullets (int): Bullet points kept per article.
+        max_title_chars (int): Titles are truncated beyond this length.
+        token_budget (int): If set, drop the lowest-priority articles until the
+            encoding fits.
+
+    Returns:
+        str: The encoded block.
+    """
+    groups = list(summaries.items()) if isinstance(summaries, dict) else [(None, list(summaries))]
+    text = _encode_rows(groups, max_bullets, max_title_chars)
+    if not token_budget or estimate_tokens(text) <= token_budget:
+        return text
+
+    # Rank every article once, then binary-search how many to drop from the bottom
+    ranked = sorted(
+        ((priority(summ), g, i) for g, (_, items) in enumerate(groups) for i, summ in enumerate(items)),
+        key=lambda t: t[0]
+    )
+
+    def without(n_dropped):
+        dropped = {(g, i) for _, g, i in ranked[:n_dropped]}
+        kept = [(name, [s for i, s in enumerate(items) if (g, i) not in dropped])
+                for g, (name, items) in enumerate(groups)]
+        return _encode_rows([k for k in kept if k[1]], max_bullets, max_title_chars)
+
+    lo, hi = 0, len(ranked)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if estimate_tokens(without(mid)) <= token_budget:
+            hi = mid
+        else:
+            lo = mid + 1
+    text = without(lo)
+    if lo:
+        text += f"\n# {lo} lower-priority articles omitted to fit the token budget"
+    return text
+
+
+def compare_encodings(summaries, **kwargs):
+    """
+    Prompt size and encode time for pretty JSON, minified JSON and the compact encoding.
+
+    Returns:
+        list of dicts: [{'encoding', 'chars', 'tokens', 'encode_ms'}, ...]
+    """
+    encoders = {
+        "json (indent=2)": lambda s: json.dumps(s, indent=2),
+        "json (minified)": lambda s: json.dumps(s, separators=(",", ":"), ensure_ascii=False),
+        "compact": lambda s: encode_summaries(s, **kwargs),
+    }
+    results = []
+    for name, encode in encoders.items():
+        start = time.perf_counter()
+        text = encode(summaries)
+        elapsed = (time.perf_counter() - start) * 1000
+        results.append({"encoding": name, "chars": len(text), "tokens": estimate_tokens(text),
+                        "encode_ms": round(elapsed, 2)})
+    return results
+
+
+if __name__ == "__main__":
+    # python Encoding.py [fixture.json] [--live]; --live also times executive_summary_agent per encoding
+    import sys
+    args = [a for a in sys.argv[1:] if a != "--live"]
+    path = args[0] if args else "fixtures/summaries_sample.json"
+    with open(path) as f:
+        fixture = json.load(f)
+    for row in compare_encodings(fixture):
+        print(f"{row['encoding']:<18} {row['chars']:>8} chars {row['tokens']:>7} tokens {row['encode_ms']:>8} ms")
+    if "--live" in sys.argv:
+        from Agents import executive_summary_agent
+        for name, text in [("json (indent=2)", json.dumps(fixture, indent=2)), ("compact", encode_summaries(fixture))]:
+            start = time.perf_counter()
+            executive_summary_agent(text)
+            print(f"{name:<18} executive_summary_agent {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+from Agents import executive_summary_agent, sector_section_agent, sector_analysis_agent
+from Analytics import SECTORS
+from Encoding import encode_summaries
+from Fetchers import IST
+
+# Per-day cache of executive summary sections and the inputs they were built from
+EXEC_CACHE_PATH = os.path.join("data", "executive_cache.json")
+
+ANALYSIS = "Sector-Specific Analysis"
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s*(.+?)\s*#*\s*$")
+
+
+def _normalize(name):
+    return re.sub(r"[^a-z]+", " ", name.lower()).strip()
+
+
+_SECTOR_KEYS = {_normalize(s): s for s in SECTORS}
+
+
+def fingerprint(items):
+    """
+    Stable hash of the source articles behind a sector's summaries.
+
+    Built from article URLs (every clustered member's, via `sources`) rather than
+    the generated text, so it changes only when articles are added or removed,
+    not when the same articles are re-summarized or re-clustered.
+    """
+    keys = sorted(key for item in items
+                  for key in (item.get("sources") or [item.get("url") or item.get("title", "")]))
+    return hashlib.sha1("\n".join(keys).encode("utf-8")).hexdigest()
+
+
+def split_sections(markdown):
+    """
+    Split an executive summary into its preamble, per-sector sections and analysis.
+
+    Returns:
+        tuple: (preamble, {sector: markdown}, analysis_markdown). Sections that
+        could not be located are simply absent from the dict.
+    """
+    preamble, sections, analysis = [], {}, []
+    current = preamble
+    level = None
+    for line in markdown.splitlines():
+        match = _HEADING_RE.match(line)
+        if match:
+            title = _normalize(match.group(2).replace("*", ""))
+            if "analysis" in title or "tailwind" in title:
+                if current is not analysis:
+                    current, level = analysis, len(match.group(1))
+            elif current is not analysis and title in _SECTOR_KEYS:
+                current, level = sections.setdefault(_SECTOR_KEYS[title], []), len(match.group(1))
+            elif current is not analysis and level is not None and len(match.group(1)) <= level:
+                # A heading at section level that is not a sector ends the current section
+                current = preamble
+        current.append(line)
+    return ("\n".join(preamble).strip(),
+            {s: "\n".join(lines).strip() for s, lines in sections.items()},
+            "\n".join(analysis).strip())
+
+
+def assemble(preamble, sections, analysis):
+    """
+    Splice cached and regenerated parts back into one document, in sector order.
+    """
+    parts = [preamble] + [sections[s] for s in SECTORS if sections.get(s)]
+    parts += [sections[s] for s in sections if s not in SECTORS and sections[s]]
+    return "\n\n".join(p for p in parts + [analysis] if p)
+
+
+def _load_cache(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path, cache):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp, path)
+
+
+def refresh_executive(routed, day=None, cache_path=EXEC_CACHE_PATH, token_budget=None, backend=None):
+    """
+    Build or incrementally update the day's executive summary.
+
+    The first run of a day generates the full document and caches its sections.
+    Later runs regenerate only sectors whose set of source articles changed, drop
+    sections whose articles are all gone, regenerate the Tailwinds/Headwinds/Neutral
+    analysis if anything changed, and splice the result into the cached document.
+
+    Args:
+        routed (dict): {sector: [summary, ...]} from Classifier.route_by_sector.
+            Summaries should carry `url` (or `sources` for cluster representatives).
+        day (str): Cache key, defaults to today's IST date.
+        cache_path (str): JSON cache file.
+        token_budget (int): Passed to Encoding.encode_summaries.
+        backend: Model backend for every agent call made here (see Agents.OpenAIBackend),
+            e.g. one wrapped by Budget.BudgetTracker.wrap_backend. Defaults to the agents' own.
+
+    Returns:
+        tuple: (markdown, changed_sectors). changed_sectors lists regenerated and removed
+        sectors, and is None after a full regeneration.
+    """
+    day = day or datetime.now(IST).date().isoformat()
+    prints = {sector: fingerprint(items) for sector, items in routed.items()}
+    cached = _load_cache(cache_path)
+
+    if cached.get("day") != day or not cached.get("sections"):
+        markdown = executive_summary_agent(encode_summaries(routed, token_budget=token_budget), backend=backend)
+        preamble, sections, analysis = split_sections(markdown)
+        _save_cache(cache_path, {
+            "day": day, "preamble": preamble, "analysis": analysis,
+            # Only sections found in the document are reusable later
+            "sections": {s: {"markdown": md, "fingerprint": prints.get(s)} for s, md in sections.items()},
+        })
+        return markdown, None
+
+    sections = {s: entry["markdown"] for s, entry in cached["sections"].items()}
+    old_prints = {s: entry["fingerprint"] for s, entry in cached["sections"].items()}
+    changed = [s for s in prints if prints[s] != old_prints.get(s)]
+    # Sections written from articles that have since left the window
+    removed = [s for s, fp in old_prints.items() if fp is not None and s not in prints]
+    if not changed and not removed:
+        return assemble(cached["preamble"], sections, cached["analysis"]), []
+
+    for sector in removed:
+        del sections[sector]
+    for sector in changed:
+        sections[sector] = sector_section_agent(sector, encode_summaries(routed[sector], token_budget=token_budget),
+                                               backend=backend)
+    analysis = sector_analysis_agent("\n\n".join(sections[s] for s in SECTORS if sections.get(s)), backend=backend)
+
+    cached["analysis"] = analysis
+    cached["sections"] = {s: {"markdown": md, "fingerprint": prints.get(s, old_prints.get(s))}
+                          for s, md in sections.items()}
+    _save_cache(cache_path, cached)
+    return assemble(cached["preamble"], sections, analysis), changed + removed
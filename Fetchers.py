@@ -1,8 +1,12 @@
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import time
 import dateutil.parser
 
+from Health import HealthTracker
+
 # Economic Times category pages to scrape
 ET_CATEGORIES = [
     "https://economictimes.indiatimes.com/news/economy/indicators",
@@ -36,89 +40,328 @@ ET_CATEGORIES = [
 ]
 
 
+# Health key for article page fetches (tracked for reporting, never skipped)
+ARTICLE_SOURCE = "article pages"
+
+# Shared per-source health and circuit breaker state
+HEALTH = HealthTracker.load(no_breaker=[ARTICLE_SOURCE])
+
+# Economic Times timestamps are in Indian Standard Time (UTC+05:30)
+IST = timezone(timedelta(hours=5, minutes=30), 'IST')
+
+
 def parse_et_date(published_str):
     """
-    Parse Economic Times date string into a datetime object.
+    Parse Economic Times date string into a timezone-aware datetime.
     ET dates often look like 'Aug 10, 2023, 12:30 PM IST'.
+    Strings without an explicit zone are assumed to be IST.
     """
     try:
-        # Remove timezone label if present
-        cleaned = published_str.replace(' IST', '')
-        return dateutil.parser.parse(cleaned)
+        parsed = dateutil.parser.parse(published_str, tzinfos={'IST': IST})
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=IST)
+        return parsed
     except Exception:
         return None
 
 
-def fetch_et_articles(category_urls=None, max_articles_per_category=5):
+def _as_aware(dt):
+    """
+    Treat naive datetimes as UTC so they can be compared with parsed ET dates.
+    """
+    if dt is None:
+        return None
+    if isinstance(dt, datetime):
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    # Plain dates mark the start of that day in IST
+    return datetime(dt.year, dt.month, dt.day, tzinfo=IST)
+
+
+def resolve_window(since=None, until=None, lookback=timedelta(days=1)):
+    """
+    Resolve a half-open [since, until) time window.
+
+    Args:
+        since (datetime|date): Window start. Defaults to until - lookback.
+        until (datetime|date): Window end (exclusive). Defaults to now.
+        lookback (timedelta): Window length used when since is not given.
+
+    Returns:
+        tuple: (since, until) as timezone-aware datetimes.
+    """
+    until = _as_aware(until) or datetime.now(timezone.utc)
+    since = _as_aware(since) or until - lookback
+    return since, until
+
+
+def _parse_category_page(html, since, until, max_articles=None, category=None):
+    """
+    Extract articles from a category page within the [since, until) window.
+
+    Returns:
+        tuple: (articles, stories_seen, oldest) where oldest is the earliest
+        parsed publish time on the page (None if nothing parsed).
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    try:
+        return _extract_stories(soup, since, until, max_articles, category)
+    finally:
+        soup.decompose()
+
+
+def _parse_listing(html, since, until, max_articles, category, parse_pool):
+    """
+    Parse a category page inline, or in a worker process when a ParsePool is given.
+    """
+    if parse_pool is None:
+        return _parse_category_page(html, since, until, max_articles, category)
+    return parse_pool.extract_listing(html, since, until, max_articles, category)
+
+
+def _extract_stories(soup, since, until, max_articles, category):
+    story_blocks = soup.select('div.eachStory') or soup.select('li.article') or []
+    articles = []
+    oldest = None
+    for block in story_blocks:
+        if max_articles is not None and len(articles) >= max_articles:
+            break
+        a = block.find('a', href=True)
+        if not a:
+            continue
+        title = a.get_text(strip=True)
+        link = a['href']
+        if link.startswith('/'):
+            link = 'https://economictimes.indiatimes.com' + link
+
+        time_tag = block.find('time') or block.find('span', class_='time')
+        pub_str = time_tag.get_text(strip=True) if time_tag else ''
+        pub_dt = parse_et_date(pub_str)
+        if pub_dt and (oldest is None or pub_dt < oldest):
+            oldest = pub_dt
+
+        # Skip if date parse failed or outside the window
+        if not pub_dt or not (since <= pub_dt < until):
+            continue
+
+        articles.append({
+            'title': title,
+            'url': link,
+            'published': pub_dt,
+            'category': category
+        })
+    return articles, len(story_blocks), oldest
+
+
+def _get_page(url, source, health, timeout=10):
+    """
+    GET a page, recording errors and latency against `source`.
+
+    Returns:
+        requests.Response with a `latency` attribute (seconds), or None if the request failed.
+    """
+    start = time.monotonic()
+    try:
+        resp = requests.get(url, timeout=timeout)
+        resp.raise_for_status()
+    except Exception as e:
+        health.record_failure(source, f"{type(e).__name__}: {e}", time.monotonic() - start)
+        return None
+    resp.latency = time.monotonic() - start
+    return resp
+
+
+def _record_listing(resp, source, seen, health):
+    """
+    A listing page that matched no stories counts as a failure (dead, redirected or re-laid-out page).
+    """
+    if seen:
+        health.record_success(source, resp.latency)
+        return
+    reason = "no stories matched div.eachStory/li.article"
+    if resp.history:
+        reason += f" (redirected to {resp.url})"
+    health.record_failure(source, reason, resp.latency, zero_stories=True)
+
+
+def record_article(url, text, latency, health=None):
+    """
+    Record an article fetch outcome; a page with no extractable body counts as a failure.
+    """
+    health = health or HEALTH
+    if text.strip():
+        health.record_success(ARTICLE_SOURCE, latency)
+    else:
+        health.record_failure(ARTICLE_SOURCE, f"empty article body at {url}", latency, zero_stories=True)
+
+
+def fetch_et_articles(category_urls=None, max_articles_per_category=5, since=None, until=None, health=None,
+                      parse_pool=None):
     """
     Scrape article links and metadata from Economic Times category pages,
-    returning only those published within the last 24 hours.
+    returning only those published within [since, until).
+
+    Categories whose circuit breaker is open are skipped.
 
     Args:
         category_urls (list): List of ET category page URLs. Defaults to ET_CATEGORIES.
         max_articles_per_category (int): Limit per category.
+        since (datetime): Window start. Defaults to 24 hours before until.
+        until (datetime): Window end (exclusive). Defaults to now.
+        health (HealthTracker): Health state to consult and update. Defaults to HEALTH.
+        parse_pool (ParsePool): If given, category pages are parsed in its worker processes.
 
     Returns:
-        List of dicts: [{'title':..., 'url':..., 'published': datetime}, ...]
+        List of dicts: [{'title':..., 'url':..., 'published': datetime, 'category': url}, ...]
+    """
+    return list(iter_et_articles(category_urls, max_articles_per_category, since, until, health, parse_pool))
+
+
+def iter_et_articles(category_urls=None, max_articles_per_category=5, since=None, until=None, health=None,
+                     parse_pool=None):
+    """
+    Generator form of fetch_et_articles: yields each article as soon as its
+    category page is parsed, so downstream stages can start immediately.
     """
     urls = category_urls or ET_CATEGORIES
-    cutoff = datetime.utcnow() - timedelta(days=1)
-    articles = []
+    health = health or HEALTH
+    since, until = resolve_window(since, until)
 
-    for cat_url in urls:
+    try:
+        for cat_url in urls:
+            if not health.allow(cat_url):
+                continue
+            resp = _get_page(cat_url, cat_url, health)
+            if resp is None:
+                continue
+            try:
+                found, seen, _ = _parse_listing(resp.content, since, until, max_articles_per_category, cat_url,
+                                                parse_pool)
+            except Exception as e:
+                health.record_failure(cat_url, f"parse error: {e}", resp.latency)
+                continue
+            finally:
+                resp.close()
+            _record_listing(resp, cat_url, seen, health)
+            yield from found
+    finally:
+        health.save()
+
+
+def _category_page_url(cat_url, page):
+    """
+    Build the URL of a paginated category archive page (page 1 is the landing page).
+    """
+    if page <= 1:
+        return cat_url
+    sep = '&' if '?' in cat_url else '?'
+    return f"{cat_url}{sep}curpg={page}"
+
+
+def _crawl_category(cat_url, since, until, max_pages, max_articles, health, parse_pool=None):
+    """
+    Walk a category's archive pages newest-first until the window is passed.
+    """
+    articles = []
+    if not health.allow(cat_url):
+        return articles
+    for page in range(1, max_pages + 1):
+        resp = _get_page(_category_page_url(cat_url, page), cat_url, health)
+        if resp is None:
+            break
         try:
-            resp = requests.get(cat_url, timeout=10)
-            resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            story_blocks = soup.select('div.eachStory') or soup.select('li.article') or []
-            count = 0
-            for block in story_blocks:
-                if count >= max_articles_per_category:
-                    break
-                a = block.find('a', href=True)
-                if not a:
-                    continue
-                title = a.get_text(strip=True)
-                link = a['href']
-                if link.startswith('/'):
-                    link = 'https://economictimes.indiatimes.com' + link
+            found, seen, oldest = _parse_listing(resp.content, since, until, None, cat_url, parse_pool)
+        except Exception as e:
+            health.record_failure(cat_url, f"parse error: {e}", resp.latency)
+            break
+        finally:
+            resp.close()
+        if not seen and page > 1:
+            # Ran past the end of the archive; only an empty landing page is a failure
+            break
+        _record_listing(resp, cat_url, seen, health)
+        articles.extend(found)
+        if max_articles is not None and len(articles) >= max_articles:
+            return articles[:max_articles]
+        # Stop on an empty page or once stories are older than the window
+        if not seen or (oldest and oldest < since):
+            break
+    return articles
 
-                time_tag = block.find('time') or block.find('span', class_='time')
-                pub_str = time_tag.get_text(strip=True) if time_tag else ''
-                pub_dt = parse_et_date(pub_str)
 
-                # Skip if date parse failed or older than cutoff
-                if not pub_dt or pub_dt < cutoff:
-                    continue
+def fetch_et_backfill(since, until, category_urls=None, max_pages=20,
+                      max_articles_per_category=None, max_workers=8, health=None, parse_pool=None):
+    """
+    Backfill articles published in [since, until) by crawling paginated
+    category archives concurrently.
 
-                articles.append({
-                    'title': title,
-                    'url': link,
-                    'published': pub_dt
-                })
-                count += 1
-        except Exception:
-            continue
+    Args:
+        since (datetime|date): Window start.
+        until (datetime|date): Window end (exclusive).
+        category_urls (list): List of ET category page URLs. Defaults to ET_CATEGORIES.
+        max_pages (int): Maximum archive pages to walk per category.
+        max_articles_per_category (int): Optional limit per category.
+        max_workers (int): Number of categories crawled in parallel.
+        health (HealthTracker): Health state to consult and update. Defaults to HEALTH.
+        parse_pool (ParsePool): If given, archive pages are parsed in its worker processes
+            while the crawl threads only fetch.
+
+    Returns:
+        List of dicts sorted newest first, de-duplicated by URL.
+    """
+    urls = category_urls or ET_CATEGORIES
+    health = health or HEALTH
+    since, until = resolve_window(since, until)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(
+            lambda u: _crawl_category(u, since, until, max_pages, max_articles_per_category, health, parse_pool),
+            urls
+        )
+        seen_urls = set()
+        articles = []
+        for found in results:
+            for art in found:
+                if art['url'] in seen_urls:
+                    continue
+                seen_urls.add(art['url'])
+                articles.append(art)
+    articles.sort(key=lambda art: art['published'], reverse=True)
+    health.save()
     return articles
 
 
-def fetch_snippet(url, max_chars=300):
+def group_by_day(articles, tz=IST):
     """
-    Fetch a short snippet (for filtering) from the article page.
+    Bucket articles by their local publish date, e.g. to summarise a backfill day by day.
+
+    Returns:
+        dict: {date: [article, ...]} ordered by date.
+    """
+    days = {}
+    for art in sorted(articles, key=lambda art: art['published']):
+        days.setdefault(art['published'].astimezone(tz).date(), []).append(art)
+    return days
+
+
+def extract_article_text(html, max_chars=None):
+    """
+    Extract article body text from an ET article page.
+
+    The parse tree is decomposed before returning so its memory is released
+    immediately rather than whenever the garbage collector gets to it.
 
     Args:
-        url (str): Article URL.
-        max_chars (int): Maximum characters in snippet.
+        html (str|bytes): Article page HTML.
+        max_chars (int): Stop once this many characters are collected (snippet mode).
 
     Returns:
-        str: Text snippet.
+        str: Paragraphs joined by newlines (or spaces in snippet mode).
     """
+    soup = BeautifulSoup(html, 'html.parser')
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, 'html.parser')
         # New ET pages often have article body in div with class 'Normal'
         paragraphs = soup.select('div.Normal p') or soup.find_all('p')
+        if max_chars is None:
+            return '\n'.join(t for t in (p.get_text(strip=True) for p in paragraphs) if t)
         text = ''
         for p in paragraphs:
             p_text = p.get_text(strip=True)
@@ -127,28 +370,68 @@ def fetch_snippet(url, max_chars=300):
             if len(text) >= max_chars:
                 break
         return text[:max_chars]
-    except Exception:
-        return ''
+    finally:
+        soup.decompose()
 
 
-def fetch_full_text(url):
+def fetch_snippet(url, max_chars=300, health=None):
+    """
+    Fetch a short snippet (for filtering) from the article page.
+
+    Args:
+        url (str): Article URL.
+        max_chars (int): Maximum characters in snippet.
+        health (HealthTracker): Health state to update. Defaults to HEALTH.
+
+    Returns:
+        str: Text snippet.
+    """
+    return _fetch_article(url, health, max_chars)
+
+
+def fetch_full_text(url, health=None):
     """
     Fetch the full text of an article page.
 
     Args:
         url (str): Article URL.
+        health (HealthTracker): Health state to update. Defaults to HEALTH.
 
     Returns:
         str: Full article text.
     """
+    return _fetch_article(url, health)
+
+
+def _fetch_article(url, health, max_chars=None):
+    health = health or HEALTH
+    resp = _get_page(url, ARTICLE_SOURCE, health)
+    if resp is None:
+        return ''
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        paragraphs = soup.select('div.Normal p') or soup.find_all('p')
-        full_text = '\n'.join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
-        return full_text
-    except Exception:
+        text = extract_article_text(resp.content, max_chars)
+    except Exception as e:
+        health.record_failure(ARTICLE_SOURCE, f"parse error: {e}", resp.latency)
         return ''
+    finally:
+        resp.close()
+    record_article(resp.url, text, resp.latency, health)
+    return text
 
 
+def fetch_article_html(url, health=None):
+    """
+    Fetch raw article HTML for out-of-process extraction (see ParsePool).
+    The caller records the outcome with record_article once text is extracted.
+
+    Returns:
+        tuple: (html_bytes, latency_seconds), or (None, None) if the request failed.
+    """
+    health = health or HEALTH
+    resp = _get_page(url, ARTICLE_SOURCE, health)
+    if resp is None:
+        return None, None
+    try:
+        return resp.content, resp.latency
+    finally:
+        resp.close()
@@ -0,0 +1,199 @@
+import json
+import os
+import threading
+import time
+
+# Default location of persisted per-source health state
+HEALTH_PATH = os.path.join("data", "source_health.json")
+
+
+class SourceHealth:
+    """
+    Rolling health of one scraped source (an ET category page, or article fetches).
+    """
+
+    FIELDS = ["requests", "successes", "failures", "zero_story_pages", "consecutive_failures",
+              "latency_ewma", "last_error", "last_success", "open_until", "trips"]
+
+    def __init__(self, **state):
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.zero_story_pages = 0
+        self.consecutive_failures = 0
+        self.latency_ewma = None
+        self.last_error = ""
+        self.last_success = None
+        self.open_until = 0.0
+        self.trips = 0
+        for key, value in state.items():
+            if key in self.FIELDS:
+                setattr(self, key, value)
+
+    @property
+    def success_rate(self):
+        return self.successes / self.requests if self.requests else None
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+
+class HealthTracker:
+    """
+    Per-source health state with a circuit breaker.
+
+    A source trips open after `failure_threshold` consecutive failures (errors,
+    timeouts or pages where no stories matched) and is skipped until its cooldown
+    expires. Each consecutive trip doubles the cooldown up to `max_cooldown`.
+    After the cooldown one trial request is allowed (half-open); success closes
+    the breaker, failure re-opens it.
+
+    Sources listed in `no_breaker` are tracked for reporting only: they are never
+    skipped and are reported as "failing" rather than "open".
+    """
+
+    def __init__(self, path=HEALTH_PATH, failure_threshold=3, cooldown=3600, max_cooldown=24 * 3600, alpha=0.3,
+                 no_breaker=()):
+        self.path = path
+        self.no_breaker = set(no_breaker)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.alpha = alpha
+        self.sources = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=HEALTH_PATH, **kwargs):
+        tracker = cls(path, **kwargs)
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    tracker.sources = {src: SourceHealth(**state) for src, state in json.load(f).items()}
+            except (OSError, ValueError):
+                pass
+        return tracker
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            data = {src: h.to_dict() for src, h in self.sources.items()}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def _get(self, source):
+        return self.sources.setdefault(source, SourceHealth())
+
+    def allow(self, source, now=None):
+        """
+        True if the source's breaker is closed or its cooldown has expired.
+        """
+        now = time.time() if now is None else now
+        if source in self.no_breaker:
+            return True
+        with self._lock:
+            return self._get(source).open_until <= now
+
+    def _observe(self, health, latency):
+        health.requests += 1
+        if latency is not None:
+            health.latency_ewma = latency if health.latency_ewma is None else (
+                self.alpha * latency + (1 - self.alpha) * health.latency_ewma)
+
+    def record_success(self, source, latency=None, now=None):
+        with self._lock:
+            health = self._get(source)
+            self._observe(health, latency)
+            health.successes += 1
+            health.consecutive_failures = 0
+            health.trips = 0
+            health.open_until = 0.0
+            health.last_success = time.time() if now is None else now
+
+    def record_failure(self, source, error, latency=None, zero_stories=False, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            health = self._get(source)
+            self._observe(health, latency)
+            health.failures += 1
+            health.zero_story_pages += int(zero_stories)
+            health.consecutive_failures += 1
+            health.last_error = str(error)[:200]
+            if health.consecutive_failures >= self.failure_threshold and source not in self.no_breaker:
+                health.open_until = now + min(self.cooldown * 2 ** health.trips, self.max_cooldown)
+                health.trips += 1
+
+    def report(self, now=None):
+        """
+        One row per source, worst first.
+
+        Returns:
+            list of dicts with source, state ("open", "failing" for a source without a
+            breaker, "degraded" or "ok"), success_rate, latency_ewma_s,
+            zero_story_pages, consecutive_failures, retry_in_s and last_error.
+        """
+        now = time.time() if now is None else now
+        rows = []
+        with self._lock:
+            for source, h in self.sources.items():
+                is_open = h.open_until > now and source not in self.no_breaker
+                if is_open:
+                    state = "open"
+                elif source in self.no_breaker and h.consecutive_failures >= self.failure_threshold:
+                    state = "failing"
+                else:
+                    state = "degraded" if h.consecutive_failures else "ok"
+                rows.append({
+                    "source": source,
+                    "state": state,
+                    "success_rate": round(h.success_rate, 2) if h.success_rate is not None else None,
+                    "latency_ewma_s": round(h.latency_ewma, 2) if h.latency_ewma is not None else None,
+                    "requests": h.requests,
+                    "zero_story_pages": h.zero_story_pages,
+                    "consecutive_failures": h.consecutive_failures,
+                    "retry_in_s": int(h.open_until - now) if is_open else 0,
+                    "last_error": h.last_error if h.consecutive_failures else "",
+                })
+        order = {"open": 0, "failing": 1, "degraded": 2, "ok": 3}
+        rows.sort(key=lambda r: (order[r["state"]], r["success_rate"] if r["success_rate"] is not None else 1))
+        return rows
+
+    def reset(self, source=None):
+        """
+        Forget health for one source, or all sources.
+        """
+        with self._lock:
+            if source is None:
+                self.sources.clear()
+            else:
+                self.sources.pop(source, None)
+
+
+def format_report(rows):
+    """
+    Plain-text health table for the CLI.
+    """
+    lines = [f"{'state':<9}{'ok%':>6}{'lat(s)':>8}{'zero':>6}{'fails':>7}{'retry':>8}  source"]
+    for r in rows:
+        rate = f"{r['success_rate'] * 100:.0f}" if r["success_rate"] is not None else "-"
+        lat = f"{r['latency_ewma_s']:.2f}" if r["latency_ewma_s"] is not None else "-"
+        retry = f"{-(-r['retry_in_s'] // 60)}m" if r["retry_in_s"] else ""
+        lines.append(f"{r['state']:<9}{rate:>6}{lat:>8}{r['zero_story_pages']:>6}{r['consecutive_failures']:>7}"
+                     f"{retry:>8}  {r['source']}")
+        if r["last_error"]:
+            lines.append(f"{'':<44}↳ {r['last_error']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python Health.py [--reset]
+    import sys
+    tracker = HealthTracker.load()
+    if "--reset" in sys.argv:
+        tracker.reset()
+        tracker.save()
+    print(format_report(tracker.report()))
@@ -0,0 +1,150 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Fetchers import _parse_category_page, extract_article_text
+
+
+def _extract_one(job):
+    kind, key, html, opts = job
+    try:
+        if kind == "article":
+            return {"key": key, "text": extract_article_text(html, opts.get("max_chars"))}
+        if kind == "listing":
+            stories, seen, oldest = _parse_category_page(html, opts["since"], opts["until"], opts.get("max_articles"),
+                                                        opts.get("category"))
+            return {"key": key, "stories": stories, "seen": seen, "oldest": oldest}
+        raise ValueError(f"unknown job kind: {kind}")
+    except Exception as e:
+        return {"key": key, "error": f"{type(e).__name__}: {e}"}
+
+
+def _extract_batch(batch):
+    # One IPC round trip per batch rather than per page
+    return [_extract_one(job) for job in batch]
+
+
+class ParsePool:
+    """
+    Optional process pool for CPU-bound HTML extraction.
+
+    Jobs are (kind, key, html_bytes, options) tuples where kind is "article"
+    (options: max_chars) or "listing" (options: since, until, max_articles, category).
+    Results are compact dicts keyed by `key`; the parse trees never leave the worker.
+
+    With workers <= 1 extraction runs inline, so callers need no special casing.
+    """
+
+    def __init__(self, workers=None, batch_size=8):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.batch_size = batch_size
+        self._executor = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def extract(self, jobs):
+        """
+        Extract a sequence of jobs, returning results in input order.
+        """
+        jobs = list(jobs)
+        if self._executor is None:
+            return [_extract_one(job) for job in jobs]
+        batches = [jobs[i:i + self.batch_size] for i in range(0, len(jobs), self.batch_size)]
+        results = []
+        for batch in self._executor.map(_extract_batch, batches):
+            results.extend(batch)
+        return results
+
+    def extract_listing(self, html, since, until, max_articles=None, category=None):
+        """
+        Parse one category page; safe to call from several fetch threads at once.
+
+        Returns:
+            tuple: (articles, stories_seen, oldest), as Fetchers._parse_category_page.
+
+        Raises:
+            RuntimeError: If the page could not be parsed.
+        """
+        opts = {"since": since, "until": until, "max_articles": max_articles, "category": category}
+        result = self.extract([("listing", category, html, opts)])[0]
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        return result["stories"], result["seen"], result["oldest"]
+
+    def extract_articles(self, pages, max_chars=None):
+        """
+        Args:
+            pages (list): (key, html_bytes) pairs.
+
+        Returns:
+            dict: key -> extracted text ('' on failure).
+        """
+        results = self.extract(("article", key, html, {"max_chars": max_chars}) for key, html in pages)
+        return {r["key"]: r.get("text", "") for r in results}
+
+
+def load_pages(directory):
+    """
+    Read recorded HTML pages (*.html) from a directory as bytes.
+    """
+    names = sorted(n for n in os.listdir(directory) if n.endswith((".html", ".htm")))
+    pages = []
+    for name in names:
+        with open(os.path.join(directory, name), "rb") as f:
+            pages.append((name, f.read()))
+    return pages
+
+
+def benchmark(pages, worker_counts=None, repeat=4, batch_size=8):
+    """
+    Article extraction throughput (pages/s) per worker count.
+
+    Args:
+        pages (list): (key, html_bytes) pairs, e.g. from load_pages().
+        worker_counts (list): Defaults to 1, 2, 4, ... up to os.cpu_count().
+        repeat (int): Times the page set is replayed per measurement.
+
+    Returns:
+        list of dicts: [{'workers', 'pages', 'seconds', 'pages_per_s', 'speedup'}, ...]
+    """
+    if worker_counts is None:
+        worker_counts, n = [], 1
+        while n < (os.cpu_count() or 1):
+            worker_counts.append(n)
+            n *= 2
+        worker_counts.append(os.cpu_count() or 1)
+    workload = pages * repeat
+    rows = []
+    for workers in worker_counts:
+        with ParsePool(workers, batch_size) as pool:
+            pool.extract_articles(pages[:workers * batch_size])  # warm up worker processes
+            start = time.perf_counter()
+            pool.extract_articles(workload)
+            elapsed = time.perf_counter() - start
+        rows.append({"workers": workers, "pages": len(workload), "seconds": round(elapsed, 2),
+                     "pages_per_s": round(len(workload) / elapsed, 1)})
+    for row in rows:
+        row["speedup"] = round(row["pages_per_s"] / rows[0]["pages_per_s"], 2)
+    return rows
+
+
+if __name__ == "__main__":
+    # python ParsePool.py [recorded_pages_dir]; synthetic ET-like pages are used if no directory is given
+    import sys
+    if len(sys.argv) > 1:
+        pages = load_pages(sys.argv[1])
+    else:
+        from Pipeline import _synthetic_page
+        pages = [(str(i), _synthetic_page(i).encode("utf-8")) for i in range(32)]
+    print(f"{len(pages)} pages, {os.cpu_count()} CPUs")
+    for row in benchmark(pages):
+        print(f"{row['workers']:>3} workers  {row['pages_per_s']:>8} pages/s  x{row['speedup']}")
@@ -0,0 +1,328 @@
+import hashlib
+import json
+import os
+import resource
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from Classifier import classify, format_hints
+from Budget import SNIPPET_CHARS
+from Fetchers import fetch_article_html, fetch_full_text, fetch_snippet, record_article
+
+# Scratch space for spilled article texts and streamed summaries
+SPOOL_DIR = os.path.join("data", "spool")
+
+
+class TextSpool:
+    """
+    Full article texts spilled to disk, keyed by URL, so only one article's
+    text is held in memory at a time.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(SPOOL_DIR, uuid.uuid4().hex)
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, url):
+        return os.path.join(self.path, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".txt")
+
+    def put(self, url, text):
+        with open(self._file(url), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def get(self, url):
+        try:
+            with open(self._file(url), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return ""
+
+    def discard(self, url):
+        try:
+            os.remove(self._file(url))
+        except OSError:
+            pass
+
+    def close(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def stream_extract(articles, spool, fetch=fetch_full_text, on_drop=None):
+    """
+    Fetch each article's full text (or only a snippet when its 'mode' is
+    'snippet'), spill it to the spool and yield the article.
+    Articles with no extractable text are dropped and passed to on_drop(article), if given.
+    """
+    for art in articles:
+        if art.get("mode") == "snippet":
+            text = fetch_snippet(art["url"], SNIPPET_CHARS)
+        else:
+            text = fetch(art["url"])
+        if not text:
+            if on_drop is not None:
+                on_drop(art)
+            continue
+        spool.put(art["url"], text)
+        del text
+        yield art
+
+
+def stream_extract_pooled(articles, spool, parse_pool, fetch_workers=8, on_drop=None):
+    """
+    Like stream_extract, but fetches a batch of pages concurrently and parses
+    them in a ParsePool so extraction is not serialised by the GIL.
+    Memory is bounded by one batch of raw HTML (workers x batch_size pages).
+    """
+    articles = iter(articles)
+    chunk = max(parse_pool.workers, 1) * parse_pool.batch_size
+    with ThreadPoolExecutor(fetch_workers) as fetcher:
+        while True:
+            batch = list(islice(articles, chunk))
+            if not batch:
+                return
+            fetched = list(fetcher.map(lambda art: fetch_article_html(art["url"]), batch))
+            pages = [(art["url"], html) for art, (html, _) in zip(batch, fetched) if html is not None]
+            texts = parse_pool.extract_articles(pages)
+            del pages
+            for art, (html, latency) in zip(batch, fetched):
+                text = ""
+                if html is not None:
+                    text = texts.pop(art["url"], "")
+                    record_article(art["url"], text, latency)
+                if art.get("mode") == "snippet":
+                    text = text[:SNIPPET_CHARS]
+                if text:
+                    spool.put(art["url"], text)
+                    yield art
+                elif on_drop is not None:
+                    on_drop(art)
+            del fetched
+
+
+def parse_summary(raw):
+    """
+    Parse a summary JSON string, tolerating the ```json fences local models often add.
+    """
+    text = raw.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return json.loads(text)
+
+
+def stream_summarize_batched(articles, spool, summarize_batch, batch_size=8, backend=None):
+    """
+    Like stream_summarize, but sends `batch_size` articles at a time to
+    summarize_batch([(title, full_text, hints), ...]) -> [json_str | Exception, ...],
+    e.g. Agents.summarize_batch on a local backend. Memory is bounded by one batch of texts.
+    """
+    kwargs = {"backend": backend} if backend is not None else {}
+    articles = iter(articles)
+    while True:
+        batch = list(islice(articles, batch_size))
+        if not batch:
+            return
+        items, tags = [], []
+        for art in batch:
+            text = spool.get(art["url"])
+            spool.discard(art["url"])
+            tag = classify(art["title"] + "\n" + text)
+            items.append((art["title"], text, format_hints(tag)))
+            tags.append(tag)
+        results = summarize_batch(items, **kwargs)
+        del items
+        for art, tag, raw in zip(batch, tags, results):
+            try:
+                if isinstance(raw, Exception):
+                    raise raw
+                summ = parse_summary(raw)
+            except Exception as e:
+                print(f"❌ Failed to summarize '{art['title']}': {e}")
+                continue
+            summ["sectors"] = tag["sectors"]
+            yield art, summ
+
+
+def stream_summarize(articles, spool, summarize, backend=None):
+    """
+    Summarize spilled articles one at a time.
+
+    Args:
+        articles (iterable): Articles whose text is in the spool.
+        spool (TextSpool): Where full texts were spilled.
+        summarize (callable): summarize(title, full_text, hints=...) -> JSON string,
+            e.g. Agents.summarize_agent.
+        backend: If given, passed to summarize as `backend=`.
+
+    Yields:
+        (article, summary_dict) pairs.
+    """
+    kwargs = {"backend": backend} if backend is not None else {}
+    for art in articles:
+        text = spool.get(art["url"])
+        tags = classify(art["title"] + "\n" + text)
+        try:
+            summ = parse_summary(summarize(art["title"], text, hints=format_hints(tags), **kwargs))
+        except Exception as e:
+            print(f"❌ Failed to summarize '{art['title']}': {e}")
+            continue
+        finally:
+            del text
+            spool.discard(art["url"])
+        summ["sectors"] = tags["sectors"]
+        yield art, summ
+
+
+def stream_persist(pairs, summaries_path, archive=True, batch_size=50):
+    """
+    Append each summary to a JSONL file and, in batches, to the Parquet archive,
+    passing the pairs through. Pending summaries are archived even if the
+    consumer closes the generator early.
+    """
+    batch = []
+
+    def flush():
+        if archive and batch:
+            from Archive import archive_run
+            archive_run([s for _, s in batch], [a for a, _ in batch])
+        batch.clear()
+
+    os.makedirs(os.path.dirname(summaries_path) or ".", exist_ok=True)
+    try:
+        with open(summaries_path, "a", encoding="utf-8") as f:
+            for art, summ in pairs:
+                record = {"url": art["url"], "published": art["published"], "summary": summ}
+                f.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+                f.flush()
+                batch.append((art, summ))
+                if len(batch) >= batch_size:
+                    flush()
+                yield art, summ
+    finally:
+        # Also runs when the consumer stops early (GeneratorExit at yield): these summaries are paid for
+        flush()
+
+
+def iter_summaries(summaries_path):
+    """
+    Read back streamed summaries without loading the whole file.
+    """
+    with open(summaries_path, encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def stream_pipeline(articles, summarize, summaries_path=None, spool=None, fetch=fetch_full_text, archive=True,
+                    parse_pool=None, summarize_batch=None, batch_size=8, backend=None, on_drop=None):
+    """
+    fetch -> extract -> summarize -> persist as a chain of generators.
+
+    Memory stays bounded by one article's HTML, text and summary regardless of
+    how many articles flow through.
+
+    Args:
+        articles (iterable): Article dicts, e.g. Fetchers.iter_et_articles().
+        summarize (callable): See stream_summarize.
+        summaries_path (str): JSONL output. Defaults to a scratch file in SPOOL_DIR
+            that is deleted when the pipeline finishes (the archive keeps the summaries).
+        spool (TextSpool): Spill location for full texts. Defaults to a fresh spool.
+        fetch (callable): url -> full text.
+        archive (bool): Also append to the Parquet archive.
+        parse_pool (ParsePool): If given, fetch pages concurrently and extract them
+            in worker processes instead of calling `fetch`.
+        summarize_batch (callable): If given, summarize `batch_size` articles per call
+            (see stream_summarize_batched) instead of calling `summarize`.
+        batch_size (int): Articles per summarize_batch call.
+        backend: Model backend passed to summarize/summarize_batch for this run only
+            (see Agents.OpenAIBackend); None uses the agents' default.
+        on_drop (callable): Called with each article dropped for lack of text,
+            e.g. BudgetTracker.release.
+
+    Yields:
+        (article, summary_dict) pairs as they are persisted.
+    """
+    own_spool = spool is None
+    spool = spool or TextSpool()
+    own_path = summaries_path is None
+    summaries_path = summaries_path or os.path.join(SPOOL_DIR, f"summaries-{uuid.uuid4().hex}.jsonl")
+    try:
+        if parse_pool is not None:
+            extracted = stream_extract_pooled(articles, spool, parse_pool, on_drop=on_drop)
+        else:
+            extracted = stream_extract(articles, spool, fetch, on_drop)
+        if summarize_batch is not None:
+            summarized = stream_summarize_batched(extracted, spool, summarize_batch, batch_size, backend)
+        else:
+            summarized = stream_summarize(extracted, spool, summarize, backend)
+        yield from stream_persist(summarized, summaries_path, archive)
+    finally:
+        if own_spool:
+            spool.close()
+        if own_path:
+            try:
+                os.remove(summaries_path)
+            except OSError:
+                pass
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process so far, in MB (Linux reports KB, macOS bytes).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def _synthetic_page(i, paragraphs=400):
+    body = "".join(
+        f"<p>Paragraph {j} of article {i}: RBI, HDFC Bank and Tata Motors moved as inflation eased "
+        f"and the rupee firmed against the dollar in early trade.</p>"
+        for j in range(paragraphs)
+    )
+    return f"<html><body><div class='Normal'>{body}</div><footer>{'x' * 20000}</footer></body></html>"
+
+
+def check_memory_bound(counts=(50, 250), max_rss_mb=400, max_growth_mb=25, workdir=None):
+    """
+    Run the streaming pipeline over synthetic ~60 KB article pages (no network or LLM)
+    and assert that peak RSS stays under `max_rss_mb` and does not grow by more than
+    `max_growth_mb` between the smallest and largest article count.
+
+    Returns:
+        dict: {article_count: peak_rss_mb}
+    """
+    from Fetchers import extract_article_text
+
+    def fetch(url):
+        return extract_article_text(_synthetic_page(int(url.rsplit("/", 1)[1])))
+
+    def summarize(title, text, hints=""):
+        return json.dumps({"title": title, "summary": [text[:200]], "impact": "", "affected": [], "tone": "Neutral"})
+
+    workdir = workdir or os.path.join(SPOOL_DIR, "rss-check")
+    peaks = {}
+    try:
+        for n in counts:
+            articles = ({"title": f"Article {i}", "url": f"synthetic://{i}", "published": None} for i in range(n))
+            for _ in stream_pipeline(articles, summarize, os.path.join(workdir, f"{n}.jsonl"),
+                                     TextSpool(os.path.join(workdir, "texts")), fetch=fetch, archive=False):
+                pass
+            peaks[n] = peak_rss_mb()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    growth = peaks[counts[-1]] - peaks[counts[0]]
+    assert peaks[counts[-1]] < max_rss_mb, f"peak RSS {peaks[counts[-1]]:.0f} MB exceeds {max_rss_mb} MB"
+    assert growth < max_growth_mb, f"peak RSS grew {growth:.0f} MB from {counts[0]} to {counts[-1]} articles"
+    return peaks
+
+
+if __name__ == "__main__":
+    # python Pipeline.py [max_rss_mb]: memory-bound self check of the streaming pipeline
+    import sys
+    bound = float(sys.argv[1]) if len(sys.argv) > 1 else 400
+    for n, peak in check_memory_bound(max_rss_mb=bound).items():
+        print(f"{n:>5} articles: peak RSS {peak:.0f} MB")
+    print(f"✅ peak RSS within {bound:.0f} MB and flat in article count")